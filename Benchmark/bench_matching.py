@@ -0,0 +1,65 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Client"))
+
+from matching import is_audio_file, match_keys_to_files
+
+
+def make_inputs(rows, files, seed):
+    rng = random.Random(seed)
+    keys = [f"ch{rng.randint(1, 40):02d}_npc{rng.randint(1, 300):03d}_{i:06d}" for i in range(rows)]
+    file_names = []
+    for i in range(files):
+        if rng.random() < 0.9:
+            key = keys[rng.randrange(rows)]
+            file_names.append(f"VO_{key}_take{rng.randint(1, 3)}.{rng.choice(['wav', 'mp3', 'WAV'])}")
+        else:
+            file_names.append(f"unmatched_{i:06d}.wav")
+    return keys, file_names
+
+
+def naive_map(string_list, file_names):
+    string_map = {string: [] for string in string_list}
+    for file_name in file_names:
+        if not is_audio_file(file_name):
+            continue
+        for string in string_list:
+            if string in file_name:
+                string_map[string].append(file_name)
+    return string_map
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark spreadsheet key to filename matching")
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--files', type=int, default=50000)
+    parser.add_argument('--naive-sample', type=int, default=200, help='Files used to time and verify the naive scan')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    keys, file_names = make_inputs(args.rows, args.files, args.seed)
+
+    started = time.perf_counter()
+    report = match_keys_to_files(keys, file_names)
+    indexed_s = time.perf_counter() - started
+
+    sample = file_names[:args.naive_sample]
+    started = time.perf_counter()
+    expected = naive_map(keys, sample)
+    naive_sample_s = time.perf_counter() - started
+    naive_estimate_s = naive_sample_s * len(file_names) / max(len(sample), 1)
+    assert match_keys_to_files(keys, sample).string_map == expected, "indexed matcher disagrees with the naive scan"
+
+    print(f"rows={args.rows} files={args.files}")
+    print(f"indexed: {indexed_s:.3f}s")
+    print(f"naive:   {naive_estimate_s:.1f}s (extrapolated from {len(sample)} files)")
+    print(f"speedup: {naive_estimate_s / indexed_s:.0f}x")
+    print(f"unmatched files: {len(report.unmatched_files)}, keys matching several files: {len(report.ambiguous_keys)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Client"))
+
+from scoring import Reference, accuracy_percentage, align, edit_distance, prepare_reference
+
+ALPHABET = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经"
+
+
+def naive_distance(a, b):
+    row = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        previous, row[0] = row[:], i
+        for j in range(1, len(b) + 1):
+            row[j] = min(previous[j] + 1, row[j - 1] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+    return row[-1]
+
+
+def corrupt(rng, text, error_rate):
+    chars = []
+    for ch in text:
+        roll = rng.random()
+        if roll < error_rate / 3:
+            continue
+        if roll < 2 * error_rate / 3:
+            chars.append(rng.choice(ALPHABET))
+        elif roll < error_rate:
+            chars.extend([ch, rng.choice(ALPHABET)])
+        else:
+            chars.append(ch)
+    return "".join(chars)
+
+
+def make_pairs(rng, count, min_len, max_len, error_rate):
+    pairs = []
+    for _ in range(count):
+        reference = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(min_len, max_len)))
+        pairs.append((reference, corrupt(rng, reference, error_rate)))
+    return pairs
+
+
+def score_pairs(pairs):
+    for reference, hypothesis in pairs:
+        accuracy_percentage(reference, hypothesis)
+
+
+def verify(rng, trials):
+    for _ in range(trials):
+        reference = "".join(rng.choice(ALPHABET[:6]) for _ in range(rng.randint(0, 120)))
+        hypothesis = "".join(rng.choice(ALPHABET[:6]) for _ in range(rng.randint(0, 120)))
+        expected = naive_distance(reference, hypothesis)
+        assert edit_distance(Reference(reference), hypothesis) == expected, (reference, hypothesis)
+        ops = align(reference, hypothesis)
+        assert ops["distance"] == expected == ops["substitutions"] + ops["deletions"] + ops["insertions"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark transcript scoring")
+    parser.add_argument('--pairs', type=int, default=5000)
+    parser.add_argument('--min-len', type=int, default=10)
+    parser.add_argument('--max-len', type=int, default=200)
+    parser.add_argument('--error-rate', type=float, default=0.1)
+    parser.add_argument('--verify-trials', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    verify(rng, args.verify_trials)
+    print(f"verified against naive DP on {args.verify_trials} random pairs")
+
+    pairs = make_pairs(rng, args.pairs, args.min_len, args.max_len, args.error_rate)
+    prepare_reference.cache_clear()
+    started = time.perf_counter()
+    score_pairs(pairs)
+    cold_s = time.perf_counter() - started
+    started = time.perf_counter()
+    score_pairs(pairs)
+    warm_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for reference, hypothesis in pairs:
+        align(reference, hypothesis)
+    align_s = time.perf_counter() - started
+
+    sample = pairs[:min(len(pairs), 200)]
+    started = time.perf_counter()
+    for reference, hypothesis in sample:
+        naive_distance(reference, hypothesis)
+    naive_s = (time.perf_counter() - started) * len(pairs) / len(sample)
+
+    print(f"pairs={len(pairs)} length={args.min_len}-{args.max_len}")
+    print(f"bit-parallel: {len(pairs) / cold_s:,.0f} pairs/s (references cached: {len(pairs) / warm_s:,.0f} pairs/s)")
+    print(f"banded align: {len(pairs) / align_s:,.0f} pairs/s")
+    print(f"naive DP:     {len(pairs) / naive_s:,.0f} pairs/s (extrapolated from {len(sample)} pairs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+import argparse
+import http.client
+import itertools
+import json
+import math
+import os
+import random
+import shlex
+import struct
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+STUB_SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub_server.py")
+
+
+def wav_header(num_bytes, sample_rate, channels):
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + num_bytes, b"WAVE", b"fmt ", 16, 1, channels,
+        sample_rate, sample_rate * channels * 2, channels * 2, 16, b"data", num_bytes,
+    )
+
+
+class ClipFactory:
+    # 预先生成一段最长片段的噪声，每个请求截取一段并写入序号，保证内容互不相同、不会命中服务端缓存
+    def __init__(self, args):
+        self.sample_rate = args.sample_rate
+        self.channels = args.channels
+        self.frame_bytes = 2 * args.channels
+        self.noise = os.urandom(int(args.clip_max_s * args.sample_rate) * self.frame_bytes + self.frame_bytes)
+        self.rng = random.Random(args.seed)
+        self.args = args
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+
+    def duration(self):
+        args = self.args
+        if args.clip_dist == "fixed":
+            value = args.clip_s
+        elif args.clip_dist == "uniform":
+            value = self.rng.uniform(args.clip_min_s, args.clip_max_s)
+        else:
+            mu = math.log(args.clip_s) - args.clip_sigma ** 2 / 2
+            value = self.rng.lognormvariate(mu, args.clip_sigma)
+        return min(max(value, args.clip_min_s), args.clip_max_s)
+
+    def make(self):
+        with self.lock:
+            duration = self.duration()
+            index = next(self.counter)
+        frames = max(8, int(duration * self.sample_rate))
+        num_bytes = frames * self.frame_bytes
+        data = struct.pack("<Q", index) + self.noise[8:num_bytes]
+        return frames / self.sample_rate, wav_header(num_bytes, self.sample_rate, self.channels) + data
+
+
+def multipart(field, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, content in files:
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{name}"\r\n'
+            f'Content-Type: audio/wav\r\n\r\n'.encode("utf-8")
+        )
+        parts.append(content)
+        parts.append(b"\r\n")
+    parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+class LoadClient:
+    def __init__(self, url, endpoint, files_per_request, clips, timeout_s):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.endpoint = endpoint
+        self.files_per_request = files_per_request if endpoint == "process_audio_batch" else 1
+        self.clips = clips
+        self.timeout_s = timeout_s
+        self.local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = self.local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout_s)
+        return conn
+
+    def build(self):
+        clips = [self.clips.make() for _ in range(self.files_per_request)]
+        field = "files" if self.endpoint == "process_audio_batch" else "file"
+        body, content_type = multipart(field, [(f"clip{i}.wav", data) for i, (_, data) in enumerate(clips)])
+        return sum(duration for duration, _ in clips), body, content_type
+
+    def send(self, body, content_type):
+        conn = self._connection()
+        try:
+            conn.request("POST", f"/{self.endpoint}", body=body, headers={"Content-Type": content_type})
+            response = conn.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException) as exc:
+            conn.close()
+            self.local.conn = None
+            return f"{type(exc).__name__}: {exc}"
+        if response.status != 200:
+            return f"HTTP {response.status}: {payload[:200].decode('utf-8', 'replace')}"
+        if self.endpoint == "process_audio_stream":
+            last = json.loads(payload.splitlines()[-1])
+            if "error" in last:
+                return last["error"]
+        elif self.endpoint == "process_audio_batch":
+            errors = [r["error"] for r in json.loads(payload)["results"].values() if "error" in r]
+            if errors:
+                return errors[0]
+        return None
+
+
+def run_closed(client, total, concurrency):
+    results = []
+    lock = threading.Lock()
+    remaining = itertools.count()
+
+    def worker():
+        while next(remaining) < total:
+            audio_s, body, content_type = client.build()
+            started = time.perf_counter()
+            error = client.send(body, content_type)
+            finished = time.perf_counter()
+            with lock:
+                results.append((started, finished, audio_s, error))
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def run_open(client, total, concurrency, rate, seed):
+    # 开环模式按泊松到达时间发请求，延迟从计划发送时刻算起，客户端排队时间也计入，避免协调遗漏
+    rng = random.Random(seed)
+    results = []
+    lock = threading.Lock()
+
+    def fire(scheduled, audio_s, body, content_type):
+        error = client.send(body, content_type)
+        finished = time.perf_counter()
+        with lock:
+            results.append((scheduled, finished, audio_s, error))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        next_at = time.perf_counter()
+        for _ in range(total):
+            audio_s, body, content_type = client.build()
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(fire, next_at, audio_s, body, content_type)
+            next_at += rng.expovariate(rate)
+    return results
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return float("nan")
+    index = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def summarize(results):
+    ok = [r for r in results if r[3] is None]
+    errors = [r[3] for r in results if r[3] is not None]
+    wall_s = max(r[1] for r in results) - min(r[0] for r in results) if results else 0.0
+    latencies = sorted(r[1] - r[0] for r in ok)
+    audio_s = sum(r[2] for r in ok)
+    return {
+        "requests": len(results),
+        "errors": len(errors),
+        "wall_s": round(wall_s, 3),
+        "requests_per_s": round(len(ok) / wall_s, 2) if wall_s else 0.0,
+        "audio_s_per_s": round(audio_s / wall_s, 2) if wall_s else 0.0,
+        "latency_mean_ms": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else float("nan"),
+        "latency_p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "latency_p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "latency_p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "latency_max_ms": round(latencies[-1] * 1000, 1) if latencies else float("nan"),
+        "sample_errors": sorted(set(errors))[:5],
+    }
+
+
+def wait_until_ready(url, timeout_s, process=None):
+    parts = urlsplit(url)
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"stub server exited with code {process.returncode}")
+        try:
+            conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=2)
+            conn.request("GET", "/check_connection")
+            if conn.getresponse().status == 200:
+                return
+        except (OSError, http.client.HTTPException):
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server at {url} not ready after {timeout_s}s")
+
+
+def start_stub_server(args):
+    command = [sys.executable, STUB_SERVER, "--port", str(args.port),
+               "--stub-latency-per-audio-s", str(args.stub_latency_per_audio_s),
+               "--stub-call-overhead-s", str(args.stub_call_overhead_s),
+               "--device", "cpu"] + shlex.split(args.server_args)
+    output = None if args.show_server_output else subprocess.DEVNULL
+    return subprocess.Popen(command, stdout=output, stderr=output)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test ASRService; starts a stub-model server unless --url is given")
+    parser.add_argument('--url', default=None, help='Existing server to test, e.g. http://localhost:5000')
+    parser.add_argument('--port', type=int, default=5055, help='Port for the stub server')
+    parser.add_argument('--server-args', default="", help='Extra arguments for the stub server, e.g. "--max-batch-size 1 --workers 2"')
+    parser.add_argument('--stub-latency-per-audio-s', type=float, default=0.02)
+    parser.add_argument('--stub-call-overhead-s', type=float, default=0.005)
+    parser.add_argument('--show-server-output', action='store_true')
+    parser.add_argument('--endpoint', choices=['process_audio', 'process_audio_batch', 'process_audio_stream'], default='process_audio')
+    parser.add_argument('--files-per-request', type=int, default=4, help='Clips per request for process_audio_batch')
+    parser.add_argument('--mode', choices=['closed', 'open'], default='closed',
+                        help='closed: each client sends its next request when the previous one returns; open: Poisson arrivals at --rate')
+    parser.add_argument('--concurrency', type=int, default=8, help='Clients (closed) or maximum in-flight requests (open)')
+    parser.add_argument('--rate', type=float, default=10.0, help='Requests per second in open-loop mode')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10, help='Requests sent before measuring')
+    parser.add_argument('--clip-dist', choices=['fixed', 'uniform', 'lognormal'], default='lognormal')
+    parser.add_argument('--clip-s', type=float, default=5.0, help='Clip length (fixed) or mean clip length (lognormal)')
+    parser.add_argument('--clip-sigma', type=float, default=0.6, help='Shape of the lognormal clip length distribution')
+    parser.add_argument('--clip-min-s', type=float, default=0.5)
+    parser.add_argument('--clip-max-s', type=float, default=30.0)
+    parser.add_argument('--sample-rate', type=int, default=16000, help='Sample rate of the generated WAV clips')
+    parser.add_argument('--channels', type=int, default=1)
+    parser.add_argument('--timeout-s', type=float, default=120.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='Print the summary as one JSON object')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    process = None
+    url = args.url
+    if url is None:
+        url = f"http://127.0.0.1:{args.port}"
+        process = start_stub_server(args)
+    try:
+        wait_until_ready(url, 120, process)
+        client = LoadClient(url, args.endpoint, args.files_per_request, ClipFactory(args), args.timeout_s)
+        if args.warmup:
+            run_closed(client, args.warmup, args.concurrency)
+        if args.mode == "closed":
+            results = run_closed(client, args.requests, args.concurrency)
+        else:
+            results = run_open(client, args.requests, args.concurrency, args.rate, args.seed)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    summary = summarize(results)
+    if args.json:
+        print(json.dumps(dict(summary, endpoint=args.endpoint, mode=args.mode, concurrency=args.concurrency)))
+        return
+    print(f"endpoint={args.endpoint} mode={args.mode} concurrency={args.concurrency} clips={args.clip_dist}")
+    print(f"requests={summary['requests']} errors={summary['errors']} wall={summary['wall_s']}s")
+    print(f"throughput: {summary['requests_per_s']} req/s, {summary['audio_s_per_s']} audio-s/s")
+    print(f"latency ms: mean={summary['latency_mean_ms']} p50={summary['latency_p50_ms']} "
+          f"p95={summary['latency_p95_ms']} p99={summary['latency_p99_ms']} max={summary['latency_max_ms']}")
+    for error in summary["sample_errors"]:
+        print(f"error: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import os
+import re
+import sys
+import time
+import types
+import zlib
+
+# 桩模型的延迟参数通过环境变量传递，spawn 出来的推理子进程也能读到同样的配置
+LATENCY_ENV = "ASR_STUB_LATENCY_PER_AUDIO_S"
+OVERHEAD_ENV = "ASR_STUB_CALL_OVERHEAD_S"
+LOAD_ENV = "ASR_STUB_LOAD_S"
+SAMPLE_RATE = 16000
+VAD_SEGMENT_MS = 10000
+WORDS = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经"
+
+
+def configure(latency_per_audio_s=None, call_overhead_s=None, load_s=None):
+    for name, value in ((LATENCY_ENV, latency_per_audio_s), (OVERHEAD_ENV, call_overhead_s), (LOAD_ENV, load_s)):
+        if value is not None:
+            os.environ[name] = str(value)
+
+
+def _settings():
+    return (
+        float(os.environ.get(LATENCY_ENV, 0.02)),
+        float(os.environ.get(OVERHEAD_ENV, 0.005)),
+    )
+
+
+def _duration(data):
+    if isinstance(data, str):
+        try:
+            import soundfile
+            return soundfile.info(data).duration
+        except Exception:
+            return 0.0
+    return len(data) / SAMPLE_RATE
+
+
+def _fake_text(data, duration):
+    # 文本只由音频长度和内容摘要决定，同一段音频每次得到相同结果
+    if isinstance(data, str):
+        seed = zlib.crc32(data.encode("utf-8"))
+    else:
+        seed = zlib.crc32(data[:SAMPLE_RATE].tobytes())
+    length = max(1, int(duration * 4))
+    text = "".join(WORDS[(seed + i * 7) % len(WORDS)] for i in range(length))
+    return f"<|zh|><|NEUTRAL|><|Speech|><|withitn|>{text}"
+
+
+class StubAutoModel:
+    def __init__(self, model=None, vad_model=None, vad_kwargs=None, device="cpu", **kwargs):
+        self.model_path = model
+        self.vad_model = vad_model
+        self.vad_kwargs = vad_kwargs or {}
+        self.device = device
+        time.sleep(float(os.environ.get(LOAD_ENV, 0)))
+
+    def _run(self, durations):
+        # 耗时按整批音频总时长计算；同一实例的调用由 ModelEngine 的锁串行化
+        latency, overhead = _settings()
+        time.sleep(overhead + latency * sum(durations))
+
+    def generate(self, input, cache=None, **kwargs):
+        inputs = input if isinstance(input, list) else [input]
+        durations = [_duration(data) for data in inputs]
+        self._run(durations)
+        return [{"key": f"stub{i}", "text": _fake_text(data, duration)}
+                for i, (data, duration) in enumerate(zip(inputs, durations))]
+
+    def inference(self, input, model=None, kwargs=None, cache=None, **extra):
+        if model is not None and model is self.vad_model:
+            total_ms = int(_duration(input) * 1000)
+            segments = [[start, min(start + VAD_SEGMENT_MS, total_ms)] for start in range(0, total_ms, VAD_SEGMENT_MS)]
+            return [{"key": "stub", "value": segments}]
+        inputs = input if isinstance(input, list) else [input]
+        durations = [_duration(data) for data in inputs]
+        self._run(durations)
+        return [{"key": f"stub{i}", "text": _fake_text(data, duration)}
+                for i, (data, duration) in enumerate(zip(inputs, durations))]
+
+
+class _Waveform:
+    def __init__(self, array):
+        self._array = array
+
+    def numpy(self):
+        return self._array
+
+
+def load_audio_text_image_video(data, fs=SAMPLE_RATE, **kwargs):
+    import soundfile
+    import numpy as np
+    waveform, sample_rate = soundfile.read(data, dtype="float32", always_2d=True)
+    waveform = waveform.mean(axis=1)
+    if sample_rate != fs:
+        positions = np.arange(0, len(waveform), sample_rate / fs)
+        waveform = np.interp(positions, np.arange(len(waveform)), waveform).astype(np.float32)
+    return _Waveform(waveform)
+
+
+def rich_transcription_postprocess(text):
+    # 拼接后的多段文本中间也带有标签，和真实实现一样去掉所有 <|...|>
+    return re.sub(r"<\|[^|]*\|>", "", text)
+
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    return module
+
+
+def install():
+    # 替换 funasr；torch 只在未安装时才用一个最小桩代替
+    funasr = _module("funasr", AutoModel=StubAutoModel)
+    utils = _module("funasr.utils")
+    utils.load_utils = _module("funasr.utils.load_utils", load_audio_text_image_video=load_audio_text_image_video)
+    utils.postprocess_utils = _module("funasr.utils.postprocess_utils", rich_transcription_postprocess=rich_transcription_postprocess)
+    funasr.utils = utils
+    try:
+        import torch
+    except ImportError:
+        cuda = types.SimpleNamespace(is_available=lambda: False)
+        _module("torch", cuda=cuda, set_num_threads=lambda n: None)
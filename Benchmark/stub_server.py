@@ -0,0 +1,27 @@
+import argparse
+import os
+import sys
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Server")
+sys.path.insert(0, SERVER_DIR)
+
+import stub_model
+
+# 模块级安装桩模型：spawn 的推理子进程会重新导入本模块，同样拿到桩 funasr
+stub_model.install()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run ASRService with a stub model; other arguments go to Server/server.py")
+    parser.add_argument('--stub-latency-per-audio-s', type=float, default=None, help='Seconds of simulated inference per second of audio')
+    parser.add_argument('--stub-call-overhead-s', type=float, default=None, help='Fixed simulated cost of every model call')
+    parser.add_argument('--stub-load-s', type=float, default=None, help='Simulated model load time')
+    args, server_args = parser.parse_known_args()
+    stub_model.configure(args.stub_latency_per_audio_s, args.stub_call_overhead_s, args.stub_load_s)
+
+    import server
+    server.main(server_args)
+
+
+if __name__ == "__main__":
+    main()
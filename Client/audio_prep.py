@@ -0,0 +1,82 @@
+import io
+import os
+import numpy as np
+import soundfile
+
+SAMPLE_RATE = 16000
+UPLOAD_FORMATS = ("raw", "pcm", "flac")
+
+
+def read_audio(file_path):
+    waveform, sample_rate = soundfile.read(file_path, dtype="float32", always_2d=True)
+    return waveform, sample_rate
+
+
+def downmix(waveform):
+    if waveform.ndim == 1:
+        return waveform
+    return waveform.mean(axis=1, dtype=np.float32)
+
+
+def lowpass_kernel(cutoff, num_taps=63):
+    # 加 Hann 窗的 sinc 低通滤波器，cutoff 为相对采样率的截止频率(周期/样本)
+    n = np.arange(num_taps) - (num_taps - 1) / 2
+    kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hanning(num_taps)
+    return (kernel / kernel.sum()).astype(np.float32)
+
+
+def resample(waveform, source_rate, target_rate=SAMPLE_RATE):
+    if source_rate == target_rate or len(waveform) == 0:
+        return waveform
+    if target_rate < source_rate:
+        # 降采样前先滤掉目标奈奎斯特频率以上的成分，避免混叠
+        waveform = np.convolve(waveform, lowpass_kernel(0.5 * target_rate / source_rate * 0.95), mode="same")
+    num_samples = int(round(len(waveform) * target_rate / source_rate))
+    positions = np.arange(num_samples) * (source_rate / target_rate)
+    return np.interp(positions, np.arange(len(waveform)), waveform).astype(np.float32)
+
+
+def trim_silence(waveform, sample_rate=SAMPLE_RATE, threshold_db=-40.0, frame_ms=20, pad_ms=100):
+    frame = max(1, int(sample_rate * frame_ms / 1000))
+    num_frames = len(waveform) // frame
+    if num_frames == 0:
+        return waveform
+    frames = waveform[:num_frames * frame].reshape(num_frames, frame)
+    rms = np.sqrt(np.mean(np.square(frames), axis=1))
+    loud = np.flatnonzero(rms > 10 ** (threshold_db / 20))
+    if loud.size == 0:
+        # 整段都低于阈值时保持原样，交给服务端判断
+        return waveform
+    pad = int(sample_rate * pad_ms / 1000)
+    start = max(0, loud[0] * frame - pad)
+    end = min(len(waveform), (loud[-1] + 1) * frame + pad)
+    return waveform[start:end]
+
+
+def normalize_audio(file_path, trim=False):
+    waveform, sample_rate = read_audio(file_path)
+    waveform = resample(downmix(waveform), sample_rate)
+    if trim:
+        waveform = trim_silence(waveform)
+    return waveform
+
+
+def encode_pcm(waveform):
+    # audio/L16 按 RFC 2586 约定为大端 16 位有符号整数
+    pcm = np.clip(waveform, -1.0, 1.0) * 32767
+    return pcm.astype(">i2").tobytes(), f"audio/L16; rate={SAMPLE_RATE}; channels=1"
+
+
+def encode_flac(waveform):
+    buffer = io.BytesIO()
+    soundfile.write(buffer, waveform, SAMPLE_RATE, format="FLAC", subtype="PCM_16")
+    return buffer.getvalue(), "audio/flac"
+
+
+def prepare_upload(file_path, upload_format="pcm", trim=False):
+    if upload_format not in ("pcm", "flac"):
+        raise ValueError(f"Unsupported upload format: {upload_format}")
+    waveform = normalize_audio(file_path, trim)
+    data, content_type = encode_pcm(waveform) if upload_format == "pcm" else encode_flac(waveform)
+    # 文件名保持不变，批量接口按文件名返回结果
+    return os.path.basename(file_path), data, content_type
@@ -0,0 +1,68 @@
+import argparse
+import json
+import sys
+import time
+from audio_prep import UPLOAD_FORMATS
+from core import MANIFEST_PATH, MatchingPipeline, wait_for_server
+
+
+def emit(event, **fields):
+    fields["event"] = event
+    fields["time"] = round(time.time(), 3)
+    sys.stderr.write(json.dumps(fields, ensure_ascii=False) + "\n")
+    sys.stderr.flush()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Match recordings to spreadsheet rows, transcribe them and score the transcripts")
+    parser.add_argument('--xlsx', required=True, help='Spreadsheet with the reference texts')
+    parser.add_argument('--sheet', required=True, help='Sheet name inside the spreadsheet')
+    parser.add_argument('--headers', required=True, nargs='+', help='Columns joined with "_" to form the audio file name key')
+    parser.add_argument('--content-header', default="文本", help='Column holding the reference text')
+    parser.add_argument('--folder', required=True, help='Folder with the audio files')
+    parser.add_argument('--server', default="http://localhost:5000", help='ASR server URL')
+    parser.add_argument('--output', required=True, help='Result file; .xlsx, .csv or .jsonl decides the format')
+    parser.add_argument('--wait-ready-s', type=float, default=120,
+                        help='Keep polling the server this long while it loads and warms up the model (0 checks once)')
+    parser.add_argument('--concurrency', type=int, default=4, help='Number of concurrent requests to the server')
+    parser.add_argument('--batch-size', type=int, default=1, help='Files per request; values above 1 use /process_audio_batch')
+    parser.add_argument('--manifest', default=MANIFEST_PATH, help='Result manifest used for incremental runs')
+    parser.add_argument('--upload-format', choices=UPLOAD_FORMATS, default='raw',
+                        help='raw uploads the original file; pcm/flac decode, downmix and resample to 16 kHz mono first')
+    parser.add_argument('--trim-silence', action='store_true', help='Trim leading and trailing silence before uploading (pcm/flac only)')
+    parser.add_argument('--no-incremental', action='store_true', help='Re-transcribe every file instead of reusing the manifest')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not wait_for_server(args.server, args.wait_ready_s, interval_s=2.0,
+                           on_wait=lambda remaining_s: emit("waiting", server=args.server, remaining_s=round(remaining_s, 1))):
+        emit("error", message=f"Cannot connect to {args.server} or it did not become ready within {args.wait_ready_s:g}s")
+        return 2
+
+    pipeline = MatchingPipeline(
+        args.server,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        manifest_path=None if args.no_incremental else args.manifest,
+        log=lambda message: emit("log", message=message),
+        upload_format=args.upload_format,
+        trim_silence=args.trim_silence,
+    )
+    started = time.monotonic()
+    emit("start", xlsx=args.xlsx, sheet=args.sheet, folder=args.folder, output=args.output)
+    try:
+        pipeline.run(
+            args.xlsx, args.sheet, args.headers, args.content_header, args.folder, args.output,
+            on_progress=lambda done, total: emit("progress", done=done, total=total),
+        )
+    except Exception as e:
+        emit("error", message=str(e))
+        return 1
+    emit("done", output=args.output, elapsed_s=round(time.monotonic() - started, 3))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
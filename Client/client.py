@@ -1,25 +1,10 @@
 import os
-import requests
 from tkinter import Tk, filedialog, StringVar, IntVar, Scrollbar, Canvas, VERTICAL
-import openpyxl
 import ttkbootstrap as ttk
 import threading
-
-def process_audio_file(file_path, server_url):
-    process_audio_url = f"{server_url}/process_audio"
-    with open(file_path, 'rb') as f:
-        response = requests.post(process_audio_url, files={'file': f})
-    if response.status_code == 200:
-        return response.json().get("text", "")
-    print(f"Error processing {file_path}: {response.json().get('error', 'Unknown error')}")
-    return None
-
-def check_server_connection(server_url):
-    try:
-        response = requests.get(f"{server_url}/check_connection")
-        return response.status_code == 200
-    except requests.exceptions.RequestException:
-        return False
+from audio_prep import UPLOAD_FORMATS
+from core import MANIFEST_PATH, MatchingPipeline, check_server_connection
+from sheet_io import read_headers, read_sheet_names
 
 class Application:
     def __init__(self, master):
@@ -39,6 +24,10 @@ class Application:
         self.folder_path_var = StringVar(value="选择一个文件夹")
         self.save_folder_path_var = StringVar(value="选择结果保存文件夹")
         self.server_url_var = StringVar(value="http://localhost:5000")
+        self.concurrency_var = IntVar(value=4)
+        self.incremental_var = IntVar(value=1)
+        self.upload_format_var = StringVar(value="raw")
+        self.trim_silence_var = IntVar(value=0)
         self.selected_headers = []
         self.content_header = "文本"
         self.content_header_var.trace_add('write', self.save_content_header_selection)
@@ -50,6 +39,7 @@ class Application:
         self.create_content_header_widgets()
         self.create_folder_selection_widgets()
         self.create_server_widgets()
+        self.create_upload_widgets()
         self.create_action_buttons()
 
     def create_file_selection_widgets(self):
@@ -91,10 +81,20 @@ class Application:
     def create_server_widgets(self):
         ttk.Label(self.master, text="服务器地址:", bootstyle="info").grid(row=6, column=0, padx=5, pady=5, sticky="w")
         ttk.Entry(self.master, textvariable=self.server_url_var, bootstyle="primary").grid(row=6, column=1, padx=5, pady=5, sticky="ew")
-        ttk.Button(self.master, text="检测服务器连接", command=self.check_server_connection, bootstyle="outline-primary").grid(row=7, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
+        ttk.Label(self.master, text="并发请求数:", bootstyle="info").grid(row=7, column=0, padx=5, pady=5, sticky="w")
+        ttk.Spinbox(self.master, from_=1, to=64, textvariable=self.concurrency_var, bootstyle="primary").grid(row=7, column=1, padx=5, pady=5, sticky="ew")
+        ttk.Button(self.master, text="检测服务器连接", command=self.check_server_connection, bootstyle="outline-primary").grid(row=8, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
+
+    def create_upload_widgets(self):
+        ttk.Label(self.master, text="上传格式:", bootstyle="info").grid(row=9, column=0, padx=5, pady=5, sticky="w")
+        upload_format_menu = ttk.OptionMenu(self.master, self.upload_format_var, self.upload_format_var.get(), *UPLOAD_FORMATS)
+        upload_format_menu.config(bootstyle="outline-primary")
+        upload_format_menu.grid(row=9, column=1, padx=5, pady=5, sticky="ew")
+        ttk.Checkbutton(self.master, text="上传前裁剪首尾静音（仅 pcm/flac）", variable=self.trim_silence_var, bootstyle="primary").grid(row=10, column=0, columnspan=2, padx=5, pady=5, sticky="w")
 
     def create_action_buttons(self):
-        ttk.Button(self.master, text="音频检测", command=self.match_files, bootstyle="outline-primary").grid(row=8, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
+        ttk.Checkbutton(self.master, text="增量检测（复用未变化文件的识别结果）", variable=self.incremental_var, bootstyle="primary").grid(row=11, column=0, columnspan=2, padx=5, pady=5, sticky="w")
+        ttk.Button(self.master, text="音频检测", command=self.match_files, bootstyle="outline-primary").grid(row=12, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
 
     def set_initial_window_size(self):
         self.master.update_idletasks()
@@ -129,8 +129,7 @@ class Application:
             self.save_selection()
 
     def load_sheets(self, file_path):
-        workbook = openpyxl.load_workbook(file_path)
-        sheet_names = workbook.sheetnames
+        sheet_names = read_sheet_names(file_path)
         self.sheet_var.set(sheet_names[0])
         self.sheet_menu['menu'].delete(0, 'end')
         for sheet in sheet_names:
@@ -147,9 +146,7 @@ class Application:
     def load_headers(self, file_path):
         for widget in self.scrollable_frame.winfo_children():
             widget.destroy()
-        workbook = openpyxl.load_workbook(file_path)
-        sheet = workbook[self.sheet_var.get()]
-        headers = [cell.value for cell in next(sheet.iter_rows(max_row=1)) if cell.value]
+        headers = [header for header in read_headers(file_path, self.sheet_var.get()) if header]
         self.header_vars = {}
         self.content_headers_menu['menu'].delete(0, 'end')
         for header in headers:
@@ -217,50 +214,35 @@ class Application:
         if not server_url:
             print("请先输入服务器URL")
             return
+        try:
+            concurrency = max(1, self.concurrency_var.get())
+        except Exception:
+            print("并发请求数必须是正整数")
+            return
 
-        workbook = openpyxl.load_workbook(file_path)
-        sheet = workbook[sheet_name]
-        string_list, original_texts = self.extract_strings_and_texts(sheet)
-        file_names = os.listdir(folder_path)
-        string_map = self.map_strings_to_files(string_list, file_names)
-        self.process_files_and_save_results(string_list, string_map, original_texts, folder_path, server_url, save_folder_path)
-
-    def extract_strings_and_texts(self, sheet):
-        string_list = []
-        original_texts = []
-        text_column_index = next((idx for idx, cell in enumerate(sheet[1]) if self.content_header_var.get() in str(cell.value)), None)
-        for row in sheet.iter_rows(min_row=2, values_only=True):
-            selected_values = [str(row[header_index]) for header_index, header in enumerate(sheet[1]) if header.value in self.selected_headers]
-            string_list.append("_".join(selected_values))
-            original_text = row[text_column_index] if text_column_index is not None else ""
-            original_texts.append(original_text)
-        return string_list, original_texts
-
-    def map_strings_to_files(self, string_list, file_names):
-        audio_extensions = {'.mp3', '.wav', '.flac', '.aac', '.ogg', '.wma'}
-        string_map = {string: [] for string in string_list}
-        for file_name in file_names:
-            if not any(file_name.lower().endswith(ext) for ext in audio_extensions):
-                continue
-            for string in string_list:
-                if string in file_name:
-                    string_map[string].append(file_name)
-        return string_map
-
-    def process_files_and_save_results(self, string_list, string_map, original_texts, folder_path, server_url, save_folder_path):
-        progress_window, progress_bar, progress_info = self.create_progress_window()
-        output_workbook, output_sheet = self.create_output_workbook()
-        total_files = len(string_list)
-        for i, string in enumerate(string_list):
-            if not string_map[string]:  # If no files matched, still add to the output
-                output_sheet.append([string, "", original_texts[i], "", "0.00%"])
-            else:
-                for file_name in string_map[string]:
-                    audio_text, overlap_rate_percentage = self.process_single_file(string, file_name, original_texts, folder_path, server_url, i)
-                    output_sheet.append([string, file_name, original_texts[i], audio_text, f"{overlap_rate_percentage:.2f}%"])
-            self.update_progress(progress_bar, progress_info, i, total_files)
-        output_workbook.save(os.path.join(save_folder_path, "匹配结果.xlsx"))
-        progress_window.destroy()
+        progress = self.create_progress_window()
+        # Tk 变量只能在主线程读取，后台线程只使用这里取出的值
+        options = (file_path, sheet_name, list(self.selected_headers), self.content_header_var.get(),
+                   folder_path, server_url, save_folder_path, concurrency, bool(self.incremental_var.get()),
+                   self.upload_format_var.get(), bool(self.trim_silence_var.get()))
+        threading.Thread(target=self.run_matching, args=(options, progress), daemon=True).start()
+
+    def run_matching(self, options, progress):
+        (file_path, sheet_name, selected_headers, content_header, folder_path, server_url, save_folder_path,
+         concurrency, incremental, upload_format, trim_silence) = options
+        _, progress_bar, progress_info = progress
+        pipeline = MatchingPipeline(server_url, concurrency=concurrency, manifest_path=MANIFEST_PATH if incremental else None,
+                                    upload_format=upload_format, trim_silence=trim_silence)
+        try:
+            pipeline.run(
+                file_path, sheet_name, selected_headers, content_header, folder_path,
+                os.path.join(save_folder_path, "匹配结果.xlsx"),
+                on_progress=lambda done, total: self.master.after(0, self.update_progress, progress_bar, progress_info, done - 1, total),
+            )
+        except Exception as e:
+            print(f"音频检测失败: {e}")
+        finally:
+            self.master.after(0, progress[0].destroy)
 
     def create_progress_window(self):
         progress_window = ttk.Toplevel(self.master)
@@ -270,38 +252,11 @@ class Application:
         progress_bar.pack(pady=10)
         progress_info = ttk.Label(progress_window, text="")
         progress_info.pack(pady=10)
-        progress_window.update()
         return progress_window, progress_bar, progress_info
 
-    def create_output_workbook(self):
-        output_workbook = openpyxl.Workbook()
-        output_sheet = output_workbook.active
-        output_sheet.title = "匹配结果"
-        output_sheet.append(["字符串", "文件名", "原文本", "录制文本", "重合率"])
-        return output_workbook, output_sheet
-
-    def process_single_file(self, string, file_name, original_texts, folder_path, server_url, index):
-        if not file_name:
-            return "", 0
-
-        audio_text = process_audio_file(os.path.join(folder_path, file_name), server_url)
-        original_text = ''.join(ch for ch in original_texts[index] if '\u4e00' <= ch <= '\u9fff')
-        recorded_text = ''.join(filter(str.isalnum, audio_text))
-        overlap_rate = self.calculate_overlap_rate(original_text, recorded_text)
-        overlap_rate_percentage = overlap_rate * 100
-
-        return audio_text, overlap_rate_percentage
-
-    def calculate_overlap_rate(self, original_text, recorded_text):
-        original_text_set = set(original_text)
-        recorded_text_set = set(recorded_text)
-        overlap_count = len(original_text_set & recorded_text_set)
-        return overlap_count / max(len(original_text_set), len(recorded_text_set)) if original_text_set and recorded_text_set else 0
-
     def update_progress(self, progress_bar, progress_info, current, total):
         progress_bar['value'] = (current + 1) / total * 100
         progress_info.config(text=f"已处理 {current + 1} 个文件，还剩 {total - (current + 1)} 个文件")
-        progress_info.master.update()
 
     def check_server_connection(self):
         def show_result(success):
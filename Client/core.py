@@ -0,0 +1,199 @@
+import os
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from matching import match_keys_to_files
+from sheet_io import open_result_sink, read_rows
+from manifest import ResultManifest
+from scoring import accuracy_percentage, align
+from audio_prep import prepare_upload
+
+MANIFEST_PATH = "result_manifest.db"
+
+def create_session(pool_size=4, retries=3, backoff_factor=0.5):
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=None,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def open_upload(file_path, upload_format="raw", trim_silence=False, log=print):
+    # 预处理成 16 kHz 单声道后再上传；解码失败时退回上传原始文件
+    if upload_format != "raw":
+        try:
+            return prepare_upload(file_path, upload_format, trim_silence)
+        except Exception as e:
+            log(f"Cannot normalize {file_path}, uploading the original file: {e}")
+    return (os.path.basename(file_path), open(file_path, 'rb'))
+
+def close_upload(upload):
+    if hasattr(upload[1], 'close'):
+        upload[1].close()
+
+def response_error(response):
+    # 服务端出错时可能返回 HTML 错误页而不是 JSON，退回到响应文本
+    try:
+        return response.json().get('error', 'Unknown error')
+    except ValueError:
+        return f"HTTP {response.status_code}: {response.text.strip()[:200]}"
+
+def process_audio_file(file_path, server_url, session=None, upload_format="raw", trim_silence=False, log=print):
+    process_audio_url = f"{server_url}/process_audio"
+    upload = open_upload(file_path, upload_format, trim_silence, log)
+    try:
+        response = (session or requests).post(process_audio_url, files={'file': upload})
+    except requests.exceptions.RequestException as e:
+        log(f"Error processing {file_path}: {e}")
+        return None
+    finally:
+        close_upload(upload)
+    if response.status_code == 200:
+        try:
+            return response.json().get("text", "")
+        except ValueError:
+            pass
+    log(f"Error processing {file_path}: {response_error(response)}")
+    return None
+
+def process_audio_batch(file_paths, server_url, session=None, upload_format="raw", trim_silence=False, log=print):
+    process_audio_batch_url = f"{server_url}/process_audio_batch"
+    uploads = [open_upload(file_path, upload_format, trim_silence, log) for file_path in file_paths]
+    try:
+        response = (session or requests).post(process_audio_batch_url, files=[('files', upload) for upload in uploads])
+    except requests.exceptions.RequestException as e:
+        log(f"Error processing batch of {len(file_paths)} files: {e}")
+        return {}
+    finally:
+        for upload in uploads:
+            close_upload(upload)
+    try:
+        payload = response.json() if response.status_code == 200 else None
+    except ValueError:
+        payload = None
+    if payload is None:
+        log(f"Error processing batch of {len(file_paths)} files: {response_error(response)}")
+        return {}
+    results = {}
+    for file_name, result in payload.get("results", {}).items():
+        if "error" in result:
+            log(f"Error processing {file_name}: {result['error']}")
+            results[file_name] = None
+        else:
+            results[file_name] = result.get("text", "")
+    return results
+
+def check_server_connection(server_url, timeout=10):
+    try:
+        response = requests.get(f"{server_url}/check_connection", timeout=timeout)
+        return response.status_code == 200
+    except requests.exceptions.RequestException:
+        return False
+
+
+def wait_for_server(server_url, timeout_s, interval_s=1.0, on_wait=None):
+    # 服务刚启动时模型加载和预热期间 /check_connection 返回 503，轮询直到就绪或超时
+    deadline = time.monotonic() + timeout_s
+    while not check_server_connection(server_url):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        if on_wait is not None:
+            on_wait(remaining)
+        time.sleep(min(interval_s, remaining))
+    return True
+
+
+class MatchingPipeline:
+    def __init__(self, server_url, concurrency=4, batch_size=1, manifest_path=MANIFEST_PATH, log=print,
+                 upload_format="raw", trim_silence=False):
+        self.server_url = server_url
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, batch_size)
+        self.upload_format = upload_format
+        self.trim_silence = trim_silence
+        # 上传方式不同，识别结果可能不同，清单按上传参数分开保存
+        self.upload_options = upload_format if upload_format == "raw" or not trim_silence else f"{upload_format}+trim"
+        self.manifest_path = manifest_path
+        self.log = log
+
+    def map_strings_to_files(self, string_list, file_names):
+        report = match_keys_to_files(string_list, file_names)
+        if report.unmatched_files:
+            self.log(f"{len(report.unmatched_files)} 个音频文件没有匹配到任何表格行: {report.unmatched_files[:10]}")
+        if report.ambiguous_keys:
+            self.log(f"{len(report.ambiguous_keys)} 个表格键匹配到多个文件: {list(report.ambiguous_keys)[:10]}")
+        return report.string_map
+
+    def run(self, xlsx_path, sheet_name, selected_headers, content_header, folder_path, output_path, on_progress=None):
+        string_list, original_texts = read_rows(xlsx_path, sheet_name, selected_headers, content_header)
+        string_map = self.map_strings_to_files(string_list, os.listdir(folder_path))
+        manifest = ResultManifest(self.manifest_path) if self.manifest_path else None
+        session = create_session(self.concurrency)
+        try:
+            with open_result_sink(output_path) as sink, ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                transcripts = self.submit_transcriptions(executor, string_map, folder_path, session, manifest)
+                self.write_results(sink, string_list, string_map, original_texts, folder_path, transcripts, manifest, on_progress)
+        finally:
+            session.close()
+            if manifest is not None:
+                self.log(f"复用 {manifest.reused} 个已有识别结果，新识别 {manifest.transcribed} 个文件")
+                manifest.close()
+
+    def submit_transcriptions(self, executor, string_map, folder_path, session, manifest):
+        # 同一个文件只识别一次；按表格顺序提交，结果按文件名取回
+        file_names = list(dict.fromkeys(file_name for files in string_map.values() for file_name in files))
+        transcripts = {}
+        for start in range(0, len(file_names), self.batch_size):
+            batch = file_names[start:start + self.batch_size]
+            future = executor.submit(self.transcribe_batch, batch, folder_path, session, manifest)
+            for file_name in batch:
+                transcripts[file_name] = future
+        return transcripts
+
+    def transcribe_batch(self, file_names, folder_path, session, manifest):
+        results = {}
+        pending = []
+        for file_name in file_names:
+            audio_path = os.path.join(folder_path, file_name)
+            text = manifest.lookup(audio_path, self.server_url, self.upload_options) if manifest is not None else None
+            if text is None:
+                pending.append(file_name)
+            else:
+                results[file_name] = text
+        if len(pending) == 1:
+            results[pending[0]] = process_audio_file(
+                os.path.join(folder_path, pending[0]), self.server_url, session, self.upload_format, self.trim_silence, self.log)
+        elif pending:
+            results.update(process_audio_batch(
+                [os.path.join(folder_path, f) for f in pending], self.server_url, session, self.upload_format, self.trim_silence, self.log))
+        if manifest is not None:
+            for file_name in pending:
+                if results.get(file_name) is not None:
+                    manifest.record(os.path.join(folder_path, file_name), self.server_url, self.upload_options, results[file_name])
+        return results
+
+    def write_results(self, sink, string_list, string_map, original_texts, folder_path, transcripts, manifest, on_progress):
+        total = len(string_list)
+        for i, string in enumerate(string_list):
+            if not string_map[string]:  # If no files matched, still add to the output
+                sink.append([string, "", original_texts[i], "", 0.0, None, None, None])
+            for file_name in string_map[string]:
+                audio_text = transcripts[file_name].result().get(file_name)
+                accuracy = accuracy_percentage(original_texts[i], audio_text)
+                ops = align(original_texts[i], audio_text)
+                if manifest is not None and audio_text is not None:
+                    manifest.update_score(os.path.join(folder_path, file_name), self.server_url, self.upload_options, string, accuracy)
+                sink.append([string, file_name, original_texts[i], audio_text or "", accuracy,
+                             ops["substitutions"], ops["deletions"], ops["insertions"]])
+            if on_progress is not None:
+                on_progress(i + 1, total)
@@ -0,0 +1,113 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+
+def file_sha256(file_path):
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class ResultManifest:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # 识别结果按文件、服务器和上传参数区分；同一文件可能匹配多个表格行，分数按表格键单独保存
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " path TEXT NOT NULL,"
+            " server_url TEXT NOT NULL,"
+            " options TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " sha256 TEXT NOT NULL,"
+            " transcript TEXT NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " PRIMARY KEY (path, server_url, options))"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            " path TEXT NOT NULL,"
+            " server_url TEXT NOT NULL,"
+            " options TEXT NOT NULL,"
+            " row_key TEXT NOT NULL,"
+            " score REAL NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " PRIMARY KEY (path, server_url, options, row_key))"
+        )
+        self._db.commit()
+        self._lock = threading.Lock()
+        self._digests = {}
+        self.reused = 0
+        self.transcribed = 0
+
+    def _fingerprint(self, file_path, stat=None):
+        stat = stat or os.stat(file_path)
+        key = (file_path, stat.st_size, stat.st_mtime_ns)
+        digest = self._digests.get(key)
+        if digest is None:
+            digest = file_sha256(file_path)
+            self._digests[key] = digest
+        return stat.st_size, stat.st_mtime_ns, digest
+
+    def lookup(self, file_path, server_url, options):
+        file_path = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT size, mtime_ns, sha256, transcript FROM results WHERE path = ? AND server_url = ? AND options = ?",
+                (file_path, server_url, options),
+            ).fetchone()
+        if row is None:
+            return None
+        size, mtime_ns, digest, transcript = row
+        if (size, mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+            # 大小或修改时间变了，再用内容哈希判断文件是否真的改变
+            size, mtime_ns, new_digest = self._fingerprint(file_path, stat)
+            if new_digest != digest:
+                return None
+            with self._lock:
+                self._db.execute(
+                    "UPDATE results SET size = ?, mtime_ns = ? WHERE path = ? AND server_url = ? AND options = ?",
+                    (size, mtime_ns, file_path, server_url, options),
+                )
+                self._db.commit()
+        with self._lock:
+            self.reused += 1
+        return transcript
+
+    def update_score(self, file_path, server_url, options, row_key, score):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO scores (path, server_url, options, row_key, score, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (os.path.abspath(file_path), server_url, options, row_key, score, time.time()),
+            )
+            self._db.commit()
+
+    def record(self, file_path, server_url, options, transcript):
+        file_path = os.path.abspath(file_path)
+        size, mtime_ns, digest = self._fingerprint(file_path)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (path, server_url, options, size, mtime_ns, sha256, transcript, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (file_path, server_url, options, size, mtime_ns, digest, transcript, time.time()),
+            )
+            # 新的识别结果让旧分数失效
+            self._db.execute(
+                "DELETE FROM scores WHERE path = ? AND server_url = ? AND options = ?",
+                (file_path, server_url, options),
+            )
+            self._db.commit()
+            self.transcribed += 1
+
+    def close(self):
+        with self._lock:
+            self._db.close()
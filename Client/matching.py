@@ -0,0 +1,91 @@
+from collections import Counter, deque
+
+AUDIO_EXTENSIONS = {'.mp3', '.wav', '.flac', '.aac', '.ogg', '.wma'}
+
+
+def is_audio_file(file_name):
+    return file_name.lower().endswith(tuple(AUDIO_EXTENSIONS))
+
+
+class KeyMatcher:
+    # Aho–Corasick 自动机：一次扫描文件名即可找出其中包含的所有表格键
+    def __init__(self, keys):
+        self.keys = list(dict.fromkeys(keys))
+        self._goto = [{}]
+        self._fail = [0]
+        self._terminal = [None]
+        self._output_link = [0]
+        for key_index, key in enumerate(self.keys):
+            self._insert(key, key_index)
+        self._build_links()
+
+    def _insert(self, key, key_index):
+        state = 0
+        for ch in key:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._terminal.append(None)
+                self._output_link.append(0)
+            state = next_state
+        self._terminal[state] = key_index
+
+    def _build_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(ch, 0)
+                self._fail[next_state] = fail
+                self._output_link[next_state] = fail if self._terminal[fail] is not None else self._output_link[fail]
+                queue.append(next_state)
+
+    def find_all(self, text):
+        found = set()
+        if self._terminal[0] is not None:
+            found.add(self.keys[self._terminal[0]])
+        goto = self._goto
+        fail = self._fail
+        terminal = self._terminal
+        output_link = self._output_link
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            match = state if terminal[state] is not None else output_link[state]
+            while match:
+                found.add(self.keys[terminal[match]])
+                match = output_link[match]
+        return found
+
+
+class MatchReport:
+    def __init__(self, string_map, unmatched_files, ambiguous_keys):
+        self.string_map = string_map
+        self.unmatched_files = unmatched_files
+        self.ambiguous_keys = ambiguous_keys
+
+
+def match_keys_to_files(string_list, file_names):
+    matcher = KeyMatcher(string_list)
+    # 与逐个子串比较的旧实现保持一致：重复出现的键会把同一文件追加多次
+    multiplicity = Counter(string_list)
+    string_map = {string: [] for string in string_list}
+    unmatched_files = []
+    for file_name in file_names:
+        if not is_audio_file(file_name):
+            continue
+        found = matcher.find_all(file_name)
+        if not found:
+            unmatched_files.append(file_name)
+        for string in found:
+            string_map[string].extend([file_name] * multiplicity[string])
+    ambiguous_keys = {string: files for string, files in string_map.items() if len(set(files)) > 1}
+    return MatchReport(string_map, unmatched_files, ambiguous_keys)
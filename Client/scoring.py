@@ -0,0 +1,104 @@
+from functools import lru_cache
+
+
+def normalize_text(text):
+    if not text:
+        return ""
+    return ''.join(ch for ch in str(text) if '\u4e00' <= ch <= '\u9fff')
+
+
+class Reference:
+    __slots__ = ("text", "peq", "mask", "last_bit")
+
+    def __init__(self, text):
+        self.text = text
+        peq = {}
+        for i, ch in enumerate(text):
+            peq[ch] = peq.get(ch, 0) | (1 << i)
+        self.peq = peq
+        self.mask = (1 << len(text)) - 1
+        self.last_bit = 1 << (len(text) - 1) if text else 0
+
+
+@lru_cache(maxsize=65536)
+def prepare_reference(raw_text):
+    return Reference(normalize_text(raw_text))
+
+
+def edit_distance(reference, hypothesis):
+    # Myers/Hyyrö 位并行算法：参考文本的每个字符占一位，按假设文本逐字符推进一整列
+    m = len(reference.text)
+    if m == 0:
+        return len(hypothesis)
+    peq = reference.peq
+    mask = reference.mask
+    last_bit = reference.last_bit
+    pv = mask
+    mv = 0
+    distance = m
+    for ch in hypothesis:
+        eq = peq.get(ch, 0)
+        xv = eq | mv
+        xh = ((((eq & pv) + pv) & mask) ^ pv) | eq
+        ph = (mv | ~(xh | pv)) & mask
+        mh = pv & xh
+        if ph & last_bit:
+            distance += 1
+        elif mh & last_bit:
+            distance -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv
+    return distance
+
+
+def accuracy_percentage(reference_text, hypothesis_text):
+    reference = prepare_reference(reference_text)
+    hypothesis = normalize_text(hypothesis_text)
+    if not reference.text or not hypothesis:
+        return 0.0
+    cer = edit_distance(reference, hypothesis) / len(reference.text)
+    return max(0.0, 1.0 - cer) * 100
+
+
+def align(reference_text, hypothesis_text):
+    # 最优路径上每个格子偏离对角线不超过编辑距离 k，只在这条带内做 DP 和回溯
+    reference = prepare_reference(reference_text)
+    hypothesis = normalize_text(hypothesis_text)
+    ref = reference.text
+    distance = edit_distance(reference, hypothesis)
+    rows = len(ref) + 1
+    cols = len(hypothesis) + 1
+    outside = distance + 1
+    dp = [[outside] * cols for _ in range(rows)]
+    for j in range(min(cols, outside)):
+        dp[0][j] = j
+    for i in range(1, rows):
+        previous = dp[i - 1]
+        current = dp[i]
+        if i <= distance:
+            current[0] = i
+        ref_ch = ref[i - 1]
+        for j in range(max(1, i - distance), min(cols - 1, i + distance) + 1):
+            value = min(previous[j - 1] + (ref_ch != hypothesis[j - 1]), previous[j] + 1, current[j - 1] + 1)
+            current[j] = value if value < outside else outside
+    substitutions = deletions = insertions = 0
+    i, j = rows - 1, cols - 1
+    while i > 0 or j > 0:
+        if i > 0 and j > 0 and dp[i][j] == dp[i - 1][j - 1] + (ref[i - 1] != hypothesis[j - 1]):
+            substitutions += ref[i - 1] != hypothesis[j - 1]
+            i, j = i - 1, j - 1
+        elif i > 0 and dp[i][j] == dp[i - 1][j] + 1:
+            deletions += 1
+            i -= 1
+        else:
+            insertions += 1
+            j -= 1
+    return {
+        "distance": distance,
+        "substitutions": substitutions,
+        "deletions": deletions,
+        "insertions": insertions,
+        "reference_length": len(ref),
+    }
@@ -0,0 +1,154 @@
+import csv
+import json
+import os
+import openpyxl
+
+RESULT_HEADER = ["字符串", "文件名", "原文本", "录制文本", "准确率", "替换", "删除", "插入"]
+RESULT_FIELDS = ["key", "file_name", "original_text", "audio_text", "accuracy", "substitutions", "deletions", "insertions"]
+ACCURACY_INDEX = RESULT_FIELDS.index("accuracy")
+
+
+def format_table_row(row):
+    # 准确率列是数值，表格输出时格式化为百分比
+    row = list(row)
+    row[ACCURACY_INDEX] = f"{row[ACCURACY_INDEX]:.2f}%"
+    return row
+
+
+def read_sheet_names(file_path):
+    workbook = openpyxl.load_workbook(file_path, read_only=True)
+    try:
+        return workbook.sheetnames
+    finally:
+        workbook.close()
+
+
+def read_headers(file_path, sheet_name):
+    workbook = openpyxl.load_workbook(file_path, read_only=True)
+    try:
+        first_row = next(workbook[sheet_name].iter_rows(max_row=1, values_only=True), ())
+        return list(first_row)
+    finally:
+        workbook.close()
+
+
+def read_rows(file_path, sheet_name, selected_headers, content_header):
+    workbook = openpyxl.load_workbook(file_path, read_only=True)
+    try:
+        rows = workbook[sheet_name].iter_rows(values_only=True)
+        headers = next(rows, ())
+        # 表头只解析一次，之后每一行都按预先算好的列下标取值
+        selected_indexes = [idx for idx, header in enumerate(headers) if header in selected_headers]
+        text_column_index = next((idx for idx, header in enumerate(headers) if content_header in str(header)), None)
+        string_list = []
+        original_texts = []
+        for row in rows:
+            selected_values = [str(row[idx] if idx < len(row) else None) for idx in selected_indexes]
+            string_list.append("_".join(selected_values))
+            if text_column_index is None:
+                original_texts.append("")
+            else:
+                original_texts.append(row[text_column_index] if text_column_index < len(row) else None)
+        return string_list, original_texts
+    finally:
+        workbook.close()
+
+
+class CsvResultSink:
+    def __init__(self, path, header=RESULT_HEADER):
+        self.path = path
+        self._file = open(path, "w", newline="", encoding="utf-8-sig")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(header)
+        self._file.flush()
+
+    def append(self, row):
+        self._writer.writerow(format_table_row(row))
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def abort(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class XlsxResultSink:
+    def __init__(self, path, header=RESULT_HEADER, sheet_title="匹配结果"):
+        self.path = path
+        self._workbook = openpyxl.Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet(sheet_title)
+        self._sheet.append(header)
+        # write-only 工作簿只能在结束时保存，同时写一份逐行刷新的 CSV，中途崩溃也不会丢失已处理的结果
+        self._journal = CsvResultSink(self.partial_path, header)
+
+    @property
+    def partial_path(self):
+        return os.path.splitext(self.path)[0] + ".partial.csv"
+
+    def append(self, row):
+        self._sheet.append(format_table_row(row))
+        self._journal.append(row)
+
+    def close(self):
+        self._workbook.save(self.path)
+        self._journal.close()
+        os.remove(self.partial_path)
+
+    def abort(self):
+        self._journal.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class JsonlResultSink:
+    def __init__(self, path, fields=RESULT_FIELDS):
+        self.path = path
+        self.fields = fields
+        self._file = open(path, "w", encoding="utf-8")
+
+    def append(self, row):
+        record = dict(zip(self.fields, row))
+        record["accuracy"] = round(record["accuracy"], 2)
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def abort(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def open_result_sink(path):
+    lowered = path.lower()
+    if lowered.endswith(".csv"):
+        return CsvResultSink(path)
+    if lowered.endswith(".jsonl"):
+        return JsonlResultSink(path)
+    return XlsxResultSink(path)
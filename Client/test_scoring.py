@@ -0,0 +1,81 @@
+import random
+import unittest
+from scoring import Reference, accuracy_percentage, align, edit_distance, normalize_text
+
+ALPHABET = "的一是在不了"
+
+
+def naive_align(reference, hypothesis):
+    rows = len(reference) + 1
+    cols = len(hypothesis) + 1
+    dp = [list(range(cols))] + [[i] + [0] * (cols - 1) for i in range(1, rows)]
+    for i in range(1, rows):
+        for j in range(1, cols):
+            dp[i][j] = min(dp[i - 1][j - 1] + (reference[i - 1] != hypothesis[j - 1]), dp[i - 1][j] + 1, dp[i][j - 1] + 1)
+    substitutions = deletions = insertions = 0
+    i, j = rows - 1, cols - 1
+    while i > 0 or j > 0:
+        if i > 0 and j > 0 and dp[i][j] == dp[i - 1][j - 1] + (reference[i - 1] != hypothesis[j - 1]):
+            substitutions += reference[i - 1] != hypothesis[j - 1]
+            i, j = i - 1, j - 1
+        elif i > 0 and dp[i][j] == dp[i - 1][j] + 1:
+            deletions += 1
+            i -= 1
+        else:
+            insertions += 1
+            j -= 1
+    return dp[-1][-1], substitutions, deletions, insertions
+
+
+class ScoringTest(unittest.TestCase):
+    def check(self, reference, hypothesis):
+        distance, substitutions, deletions, insertions = naive_align(reference, hypothesis)
+        self.assertEqual(edit_distance(Reference(reference), hypothesis), distance, (reference, hypothesis))
+        ops = align(reference, hypothesis)
+        self.assertEqual((ops["distance"], ops["substitutions"], ops["deletions"], ops["insertions"]),
+                         (distance, substitutions, deletions, insertions), (reference, hypothesis))
+        self.assertEqual(ops["reference_length"], len(reference))
+
+    def test_empty_strings(self):
+        self.check("", "")
+        self.check("", "的一是")
+        self.check("的一是", "")
+
+    def test_known_counts(self):
+        ops = align("你好世界", "你好视界啊")
+        self.assertEqual((ops["substitutions"], ops["deletions"], ops["insertions"]), (1, 0, 1))
+        ops = align("你好世界", "好世间")
+        self.assertEqual((ops["substitutions"], ops["deletions"], ops["insertions"]), (1, 1, 0))
+
+    def test_random_pairs_match_naive(self):
+        rng = random.Random(0)
+        for _ in range(500):
+            alphabet = ALPHABET[:rng.randint(1, len(ALPHABET))]
+            reference = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+            hypothesis = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+            self.check(reference, hypothesis)
+
+    def test_references_longer_than_64(self):
+        rng = random.Random(1)
+        for length in (63, 64, 65, 128, 200):
+            reference = "".join(rng.choice(ALPHABET) for _ in range(length))
+            self.check(reference, reference)
+            self.check(reference, reference[1:] + "的")
+            self.check(reference, "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 220))))
+
+    def test_normalize_keeps_only_cjk(self):
+        self.assertEqual(normalize_text("你好, world 123！世界"), "你好世界")
+        self.assertEqual(normalize_text(None), "")
+        ops = align("你好，世界", "你好世界!")
+        self.assertEqual(ops["distance"], 0)
+
+    def test_accuracy_percentage(self):
+        self.assertEqual(accuracy_percentage("你好世界", "你好世界"), 100.0)
+        self.assertEqual(accuracy_percentage("你好世界", "你好"), 50.0)
+        self.assertEqual(accuracy_percentage("你好", "你好世界再见"), 0.0)
+        self.assertEqual(accuracy_percentage("你好", None), 0.0)
+        self.assertEqual(accuracy_percentage("", "你好"), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
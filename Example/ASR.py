@@ -1,38 +1,203 @@
-from funasr import AutoModel
+import argparse
+import glob
+import os
+import queue
+import sys
+import threading
+import time
 from funasr.utils.postprocess_utils import rich_transcription_postprocess
 
+# 解码、VAD 合并和跨文件拼批与服务端共用 Server/engine.py 的实现
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Server"))
+
+from audio import SAMPLE_RATE
+from engine import GENERATE_KWARGS, ModelEngine, default_device, load_waveform
+
 model_dir = "iic/SenseVoiceSmall"
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".flac", ".m4a", ".aac", ".ogg", ".opus", ".wma")
+_DONE = object()
 
-model = AutoModel(
-    model=model_dir,
-    vad_model="fsmn-vad",
-    vad_kwargs={"max_single_segment_time": 30000},
-    device="cuda:0",
-)
 
-# en
-import tkinter as tk
-from tkinter import filedialog
-import os
+def select_files_with_dialog():
+    import tkinter as tk
+    from tkinter import filedialog
+
+    root = tk.Tk()
+    root.withdraw()
+    return list(filedialog.askopenfilenames(title="选择音频文件", filetypes=[("音频文件", "*.mp3 *.wav")]))
+
+
+def collect_files(patterns, recursive=False):
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            if recursive:
+                for dirpath, _, names in os.walk(pattern):
+                    files.extend(os.path.join(dirpath, name) for name in names)
+            else:
+                files.extend(os.path.join(pattern, name) for name in os.listdir(pattern))
+        elif glob.has_magic(pattern):
+            files.extend(glob.glob(pattern, recursive=True))
+        else:
+            files.append(pattern)
+    audio_files = [f for f in files if os.path.isfile(f) and f.lower().endswith(AUDIO_EXTENSIONS)]
+    return sorted(dict.fromkeys(audio_files))
+
+
+def common_root(file_paths):
+    if not file_paths:
+        return None
+    return os.path.commonpath([os.path.dirname(os.path.abspath(f)) for f in file_paths])
+
+
+def output_path_for(file_path, output_dir=None, input_root=None):
+    # 输出目录下保留相对 input_root 的子目录结构，不同目录中的同名文件不会互相覆盖
+    base = os.path.splitext(file_path)[0] + ".txt"
+    if output_dir is None:
+        return base
+    if input_root is None:
+        return os.path.join(output_dir, os.path.basename(base))
+    return os.path.join(output_dir, os.path.relpath(os.path.abspath(base), input_root))
+
+
+def decode_worker(paths, decoded):
+    while True:
+        try:
+            file_path = paths.get_nowait()
+        except queue.Empty:
+            break
+        try:
+            decoded.put((file_path, load_waveform(file_path)))
+        except Exception as e:
+            print(f"Error decoding {file_path}: {e}")
+    decoded.put(_DONE)
 
-root = tk.Tk()
-root.withdraw()
 
-file_paths = filedialog.askopenfilenames(title="选择音频文件", filetypes=[("音频文件", "*.mp3 *.wav")])
+def write_worker(results, output_dir, input_root):
+    while True:
+        item = results.get()
+        if item is _DONE:
+            return
+        file_path, text = item
+        output_path = output_path_for(file_path, output_dir, input_root)
+        # 先写临时文件再替换，中途中断不会留下被 --skip-existing 误认为已完成的半截文件
+        tmp_path = output_path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, output_path)
+        except OSError as e:
+            print(f"Error writing {output_path}: {e}")
 
-for file_path in file_paths:
-    res = model.generate(
-        input=file_path,
-        cache={},
-        language="auto",  # "zn", "en", "yue", "ja", "ko", "nospeech"
-        use_itn=True,
-        batch_size_s=60,
-        merge_vad=True,  #
-        merge_length_s=15,
+
+def iter_decoded_windows(decoded, decode_workers, sort_window):
+    window = []
+    finished = 0
+    while finished < decode_workers:
+        item = decoded.get()
+        if item is _DONE:
+            finished += 1
+            continue
+        window.append(item)
+        if len(window) >= sort_window:
+            yield window
+            window = []
+    if window:
+        yield window
+
+
+def transcribe_window(engine, window):
+    # 整个窗口内所有文件的语音段放在一起按长度排序批量识别；整批失败时逐个文件重试
+    waveforms = [waveform for _, waveform in window]
+    try:
+        return engine.generate(waveforms)[0]
+    except Exception as e:
+        print(f"Window of {len(window)} files failed, retrying one by one: {e}")
+    texts = []
+    for file_path, waveform in window:
+        try:
+            texts.append(engine.generate([waveform])[0][0])
+        except Exception as e:
+            print(f"Error transcribing {file_path}: {e}")
+            texts.append(None)
+    return texts
+
+
+def run_pipeline(engine, file_paths, output_dir=None, input_root=None, decode_workers=4, queue_size=64, sort_window=32):
+    # 解码线程池 -> 有界队列 -> 单一推理循环 -> 有界队列 -> 写文件线程；队列满时上游自动等待
+    paths = queue.Queue()
+    for file_path in file_paths:
+        paths.put(file_path)
+    decoded = queue.Queue(maxsize=queue_size)
+    results = queue.Queue(maxsize=queue_size)
+    decoders = [threading.Thread(target=decode_worker, args=(paths, decoded), daemon=True) for _ in range(decode_workers)]
+    writer = threading.Thread(target=write_worker, args=(results, output_dir, input_root), daemon=True)
+    for thread in decoders:
+        thread.start()
+    writer.start()
+
+    started = time.perf_counter()
+    done = 0
+    failed = 0
+    audio_s = 0.0
+    try:
+        for window in iter_decoded_windows(decoded, decode_workers, sort_window):
+            texts = transcribe_window(engine, window)
+            for (file_path, waveform), text in zip(window, texts):
+                if text is None:
+                    failed += 1
+                    continue
+                results.put((file_path, rich_transcription_postprocess(text)))
+                done += 1
+                audio_s += len(waveform) / SAMPLE_RATE
+            elapsed = time.perf_counter() - started
+            print(f"{done}/{len(file_paths)} files, {audio_s:.0f}s audio, {audio_s / elapsed:.1f} audio-s/s")
+    finally:
+        results.put(_DONE)
+        writer.join()
+    elapsed = time.perf_counter() - started
+    print(f"Transcribed {done} files ({audio_s:.0f}s audio) in {elapsed:.1f}s, "
+          f"{len(file_paths) - done - failed} not decoded, {failed} failed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe audio files offline; writes a .txt next to each file")
+    parser.add_argument('paths', nargs='*', help='Audio files, directories or glob patterns; opens a file dialog when omitted')
+    parser.add_argument('--recursive', action='store_true', help='Descend into subdirectories of directory arguments')
+    parser.add_argument('--skip-existing', action='store_true', help='Skip files whose .txt output already exists')
+    parser.add_argument('--output-dir', default=None,
+                        help='Write .txt files here instead of next to the audio, mirroring the input subdirectories')
+    parser.add_argument('--model-dir', default=model_dir)
+    parser.add_argument('--device', default=None, help='Defaults to cuda:0 when available, otherwise cpu')
+    parser.add_argument('--decode-workers', type=int, default=4, help='Threads decoding audio ahead of inference')
+    parser.add_argument('--queue-size', type=int, default=64, help='Decoded clips and pending outputs buffered between stages')
+    parser.add_argument('--sort-window', type=int, default=32, help='Decoded clips whose speech segments are pooled and sorted by length before batching')
+    parser.add_argument('--batch-size-s', type=float, default=GENERATE_KWARGS["batch_size_s"], help='Maximum padded audio seconds per ASR call')
+    args = parser.parse_args()
+
+    file_paths = collect_files(args.paths, args.recursive) if args.paths else select_files_with_dialog()
+    input_root = common_root(file_paths)
+    if args.skip_existing:
+        remaining = [f for f in file_paths if not os.path.exists(output_path_for(f, args.output_dir, input_root))]
+        print(f"Skipping {len(file_paths) - len(remaining)} files with existing output")
+        file_paths = remaining
+    if not file_paths:
+        print("No audio files to transcribe")
+        return
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    engine = ModelEngine(args.model_dir, args.device or default_device(), batch_size_s=args.batch_size_s)
+    run_pipeline(
+        engine, file_paths,
+        output_dir=args.output_dir,
+        input_root=input_root,
+        decode_workers=max(1, args.decode_workers),
+        queue_size=max(1, args.queue_size),
+        sort_window=max(1, args.sort_window),
     )
-    text = rich_transcription_postprocess(res[0]["text"])
-    
-    # 保存文本到同名txt文件
-    output_path = os.path.splitext(file_path)[0] + ".txt"
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(text)
\ No newline at end of file
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import hashlib
+import io
+import os
+import tarfile
+import tempfile
+import zipfile
+import numpy as np
+import soundfile
+import soxr
+from werkzeug.datastructures import FileStorage
+
+SAMPLE_RATE = 16000
+UPLOAD_PREFIX = "asr-upload-"
+
+
+class AudioInput:
+    def __init__(self, data, duration, path=None, digest=None):
+        self.data = data
+        self.duration = duration
+        self.path = path
+        self.digest = digest
+
+    def close(self):
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+        self.path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def audio_duration(file_path):
+    try:
+        return soundfile.info(file_path).duration
+    except RuntimeError:
+        return 0.0
+
+
+def decode_audio(source):
+    waveform, sample_rate = soundfile.read(source, dtype="float32", always_2d=True)
+    waveform = waveform.mean(axis=1)
+    if sample_rate != SAMPLE_RATE:
+        waveform = soxr.resample(waveform, sample_rate, SAMPLE_RATE)
+    return np.ascontiguousarray(waveform, dtype=np.float32)
+
+
+def decode_pcm(data, sample_rate=SAMPLE_RATE, channels=1):
+    # audio/L16 按 RFC 2586 为大端 16 位 PCM；客户端已处理成 16 kHz 单声道时不再重采样
+    if sample_rate <= 0 or channels <= 0:
+        raise ValueError("audio/L16 rate and channels must be positive")
+    frame_bytes = 2 * channels
+    samples = np.frombuffer(data[:len(data) // frame_bytes * frame_bytes], dtype=">i2")
+    waveform = samples.astype(np.float32) / 32768
+    if channels > 1:
+        waveform = waveform.reshape(-1, channels).mean(axis=1)
+    if sample_rate != SAMPLE_RATE:
+        waveform = soxr.resample(waveform, sample_rate, SAMPLE_RATE)
+    return np.ascontiguousarray(waveform, dtype=np.float32)
+
+
+def load_pcm_upload(file):
+    params = file.mimetype_params
+    try:
+        sample_rate = int(params.get("rate", SAMPLE_RATE))
+        channels = int(params.get("channels", 1))
+    except ValueError:
+        raise ValueError("audio/L16 rate and channels must be integers")
+    file.stream.seek(0)
+    data = file.stream.read()
+    waveform = decode_pcm(data, sample_rate, channels)
+    # 裸 PCM 没有文件头，采样率和声道数也要进摘要，否则同样的字节按不同格式上传会命中错误的缓存
+    digest = hashlib.sha256(f"audio/L16;rate={sample_rate};channels={channels}\n".encode("ascii"))
+    digest.update(data)
+    return AudioInput(waveform, len(waveform) / SAMPLE_RATE, digest=digest.hexdigest())
+
+
+def open_upload_stream(tmp_dir, spool_threshold_bytes, content_length, filename=None):
+    # 小文件的上传内容只保存在内存中；已知超过阈值的直接写入命名临时文件，之后改名交给 AudioInput，只落盘一次
+    if content_length is not None and content_length > spool_threshold_bytes:
+        suffix = os.path.splitext(filename or "")[1]
+        return tempfile.NamedTemporaryFile(prefix=UPLOAD_PREFIX, suffix=suffix, dir=tmp_dir, delete=False)
+    return tempfile.SpooledTemporaryFile(max_size=spool_threshold_bytes, dir=tmp_dir)
+
+
+def _upload_file_path(stream, tmp_dir):
+    path = getattr(stream, "name", None)
+    if not isinstance(path, str) or not os.path.basename(path).startswith(UPLOAD_PREFIX):
+        return None
+    if os.path.dirname(path) != os.path.abspath(tmp_dir or tempfile.gettempdir()) or not os.path.isfile(path):
+        return None
+    return path
+
+
+def _read_chunks(stream):
+    stream.seek(0)
+    while True:
+        chunk = stream.read(1 << 20)
+        if not chunk:
+            return
+        yield chunk
+
+
+def spool_upload(file, tmp_dir):
+    sha256 = hashlib.sha256()
+    upload_path = _upload_file_path(file.stream, tmp_dir)
+    if upload_path is not None:
+        # 上传时已写入磁盘：只读一遍算摘要，再改名接管，请求结束时的清理不会删掉它
+        for chunk in _read_chunks(file.stream):
+            sha256.update(chunk)
+        file.stream.close()
+        fd, path = tempfile.mkstemp(suffix=os.path.splitext(upload_path)[1], dir=tmp_dir)
+        os.close(fd)
+        os.replace(upload_path, path)
+        return AudioInput(path, audio_duration(path), path=path, digest=sha256.hexdigest())
+    suffix = os.path.splitext(file.filename or "")[1]
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=tmp_dir)
+    with os.fdopen(fd, "wb") as f:
+        for chunk in _read_chunks(file.stream):
+            sha256.update(chunk)
+            f.write(chunk)
+    return AudioInput(path, audio_duration(path), path=path, digest=sha256.hexdigest())
+
+
+def load_upload(file, tmp_dir, spool_threshold_bytes):
+    if file.mimetype == "audio/l16":
+        return load_pcm_upload(file)
+    stream = file.stream
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+    if size > spool_threshold_bytes:
+        return spool_upload(file, tmp_dir)
+    data = stream.read()
+    try:
+        waveform = decode_audio(io.BytesIO(data))
+    except RuntimeError:
+        # soundfile 不支持的格式(aac/wma 等)落盘后交给 funasr 解码
+        return spool_upload(file, tmp_dir)
+    return AudioInput(waveform, len(waveform) / SAMPLE_RATE, digest=hashlib.sha256(data).hexdigest())
+
+
+def _is_archive_junk(name):
+    base = os.path.basename(name)
+    return not base or base.startswith(".") or name.startswith("__MACOSX/")
+
+
+def iter_archive(file):
+    # 逐个成员产出 (文件名, FileStorage)；单个成员损坏时产出 (文件名, 异常)，不影响其他成员
+    stream = file.stream
+    stream.seek(0)
+    if zipfile.is_zipfile(stream):
+        stream.seek(0)
+        try:
+            archive = zipfile.ZipFile(stream)
+        except (zipfile.BadZipFile, OSError) as exc:
+            raise ValueError(f"Corrupt zip archive: {exc}")
+        with archive:
+            for info in archive.infolist():
+                if info.is_dir() or _is_archive_junk(info.filename):
+                    continue
+                try:
+                    yield info.filename, FileStorage(io.BytesIO(archive.read(info)), filename=info.filename)
+                except Exception as exc:
+                    yield info.filename, ValueError(f"Could not extract from archive: {exc}")
+        return
+    stream.seek(0)
+    try:
+        archive = tarfile.open(fileobj=stream, mode="r:*")
+    except tarfile.TarError:
+        raise ValueError("Archive must be a zip or tar file")
+    with archive:
+        members = iter(archive)
+        while True:
+            try:
+                member = next(members)
+            except StopIteration:
+                return
+            except (tarfile.TarError, EOFError, OSError) as exc:
+                # tar 文件后半部分损坏时无法继续定位后续成员，保留已读出的部分
+                yield file.filename, ValueError(f"Corrupt tar archive: {exc}")
+                return
+            if not member.isfile() or _is_archive_junk(member.name):
+                continue
+            try:
+                yield member.name, FileStorage(io.BytesIO(archive.extractfile(member).read()), filename=member.name)
+            except Exception as exc:
+                yield member.name, ValueError(f"Could not extract from archive: {exc}")
@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+class _PendingRequest:
+    __slots__ = ("audio", "duration", "future")
+
+    def __init__(self, audio, duration, future):
+        self.audio = audio
+        self.duration = duration
+        self.future = future
+
+
+class BatchScheduler:
+    def __init__(self, process_batch, window_ms=10, max_batch_size=8, max_batch_audio_s=300, concurrency=1):
+        self.process_batch = process_batch
+        self.window_s = window_ms / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_batch_audio_s = max_batch_audio_s
+        self._pending = deque()
+        self._pending_audio_s = 0.0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._run, name=f"asr-batch-scheduler-{i}", daemon=True)
+            for i in range(max(1, concurrency))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, audio, duration=0.0):
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("BatchScheduler is closed")
+            self._pending.append(_PendingRequest(audio, duration, future))
+            self._pending_audio_s += duration
+            self._cond.notify_all()
+        return future
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._dispatch(batch)
+
+    def _batch_full(self):
+        return len(self._pending) >= self.max_batch_size or self._pending_audio_s >= self.max_batch_audio_s
+
+    def _next_batch(self):
+        with self._cond:
+            while True:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return None
+                # 等待一个短窗口，让同时到达的请求合并成一个批次
+                deadline = time.monotonic() + self.window_s
+                while not self._batch_full() and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                # 多个调度线程时，窗口内的请求可能已被其他线程取走
+                if self._pending:
+                    return self._take_batch()
+
+    def _take_batch(self):
+        first = self._pending.popleft()
+        batch = [first]
+        audio_s = first.duration
+        while self._pending and len(batch) < self.max_batch_size:
+            duration = self._pending[0].duration
+            if audio_s + duration > self.max_batch_audio_s:
+                break
+            batch.append(self._pending.popleft())
+            audio_s += duration
+        self._pending_audio_s = max(0.0, self._pending_audio_s - audio_s)
+        return batch
+
+    def _dispatch(self, batch):
+        batch = [item for item in batch if item.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            results = self.process_batch([item.audio for item in batch])
+        except Exception as exc:
+            if len(batch) == 1:
+                batch[0].future.set_exception(exc)
+                return
+            # 批次失败时逐个重试，避免一个坏文件拖垮同批的其他请求
+            for item in batch:
+                try:
+                    item.future.set_result(self.process_batch([item.audio])[0])
+                except Exception as item_exc:
+                    item.future.set_exception(item_exc)
+            return
+        if len(results) != len(batch):
+            # 结果数量不对时无法确定对应关系，整批报错，避免有请求永远等不到结果
+            exc = RuntimeError(f"Batch returned {len(results)} results for {len(batch)} inputs")
+            for item in batch:
+                item.future.set_exception(exc)
+            return
+        for item, result in zip(batch, results):
+            item.future.set_result(result)
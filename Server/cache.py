@@ -0,0 +1,80 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+class TranscriptionCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024, db_path=None):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._db = self._open_db(db_path) if db_path else None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _open_db(db_path):
+        db = sqlite3.connect(db_path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("CREATE TABLE IF NOT EXISTS transcripts (key TEXT PRIMARY KEY, text TEXT NOT NULL)")
+        db.commit()
+        return db
+
+    @staticmethod
+    def make_key(audio_digest, params):
+        payload = json.dumps(params, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(f"{audio_digest}\n{payload}".encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return text
+            if self._db is not None:
+                row = self._db.execute("SELECT text FROM transcripts WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self.disk_hits += 1
+                    self._remember(key, row[0])
+                    return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, key, text):
+        with self._lock:
+            self._remember(key, text)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO transcripts (key, text) VALUES (?, ?)", (key, text))
+                self._db.commit()
+
+    def _remember(self, key, text):
+        if key in self._entries:
+            self._size -= self._entry_size(key, self._entries.pop(key))
+        size = self._entry_size(key, text)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = text
+        self._size += size
+        while self._size > self.max_bytes:
+            old_key, old_text = self._entries.popitem(last=False)
+            self._size -= self._entry_size(old_key, old_text)
+
+    @staticmethod
+    def _entry_size(key, text):
+        return len(key) + len(text.encode("utf-8"))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
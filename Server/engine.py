@@ -0,0 +1,152 @@
+import threading
+import time
+import numpy as np
+import torch
+from funasr import AutoModel
+from funasr.utils.load_utils import load_audio_text_image_video
+from audio import SAMPLE_RATE, decode_audio
+
+VAD_MODEL = "fsmn-vad"
+VAD_KWARGS = {"max_single_segment_time": 30000}
+GENERATE_KWARGS = {
+    "language": "auto",
+    "use_itn": True,
+    "batch_size_s": 60,
+    "merge_vad": True,
+    "merge_length_s": 15,
+}
+SEGMENT_KWARGS = {
+    "language": GENERATE_KWARGS["language"],
+    "use_itn": GENERATE_KWARGS["use_itn"],
+}
+WARMUP_DURATIONS_S = (1, 5, 15)
+
+
+def default_device():
+    return "cuda:0" if torch.cuda.is_available() else "cpu"
+
+
+def merge_segments(segments, max_length_ms, min_length_ms=0):
+    # 移植自 funasr.utils.vad_utils.merge_vad：从 0 开始按排序后的时间点切分，
+    # 片段覆盖相邻语音段之间的静音，下一个时间点距起点不足 max_length_ms 时继续合并
+    if len(segments) <= 1:
+        return [list(segment) for segment in segments]
+    time_steps = sorted(set([start for start, _ in segments] + [end for _, end in segments]))
+    merged = []
+    begin = 0
+    for i in range(len(time_steps) - 1):
+        time_ms = time_steps[i]
+        if time_steps[i + 1] - begin < max_length_ms:
+            continue
+        if time_ms - begin > min_length_ms:
+            merged.append([begin, time_ms])
+        begin = time_ms
+    merged.append([begin, time_steps[-1]])
+    return merged
+
+
+def load_waveform(source):
+    if not isinstance(source, str):
+        return source
+    try:
+        return decode_audio(source)
+    except RuntimeError:
+        return load_audio_text_image_video(source, fs=SAMPLE_RATE).numpy()
+
+
+class ModelEngine:
+    def __init__(self, model_dir, device, batch_size_s=GENERATE_KWARGS["batch_size_s"]):
+        self.model_dir = model_dir
+        self.device = device
+        self.batch_size_s = batch_size_s
+        self.model = AutoModel(
+            model=model_dir,
+            vad_model=VAD_MODEL,
+            vad_kwargs=VAD_KWARGS,
+            device=device,
+            disable_update=True,
+        )
+        # AutoModel.inference 会修改共享的 kwargs，同一个模型实例上的所有调用都经过这把锁串行执行
+        self._lock = threading.Lock()
+
+    def generate(self, inputs):
+        # model.generate 带 VAD 时逐条处理输入，这里改为逐条做 VAD，再把所有请求的语音段合在一起批量识别；
+        # 解码放在锁外，大文件或需要 ffmpeg 解码的格式不会挡住同一模型上的其他调用。
+        # 返回文本、本次调用各阶段耗时和音频总时长
+        started = time.perf_counter()
+        waveforms = [load_waveform(source) for source in inputs]
+        stages = {"decode": time.perf_counter() - started}
+        with self._lock:
+            started = time.perf_counter()
+            owners = []
+            segments = []
+            for index, waveform in enumerate(waveforms):
+                spans = merge_segments(self._vad_segments(waveform), GENERATE_KWARGS["merge_length_s"] * 1000)
+                for start_ms, end_ms in spans:
+                    segment = waveform[int(start_ms * SAMPLE_RATE / 1000):int(end_ms * SAMPLE_RATE / 1000)]
+                    if len(segment):
+                        owners.append(index)
+                        segments.append(segment)
+            stages["vad"] = time.perf_counter() - started
+            started = time.perf_counter()
+            texts = self._transcribe_pooled(segments)
+            stages["asr"] = time.perf_counter() - started
+        parts = [[] for _ in inputs]
+        for index, text in zip(owners, texts):
+            parts[index].append(text)
+        audio_s = sum(len(waveform) for waveform in waveforms) / SAMPLE_RATE
+        return ["".join(part) for part in parts], stages, audio_s
+
+    def vad_segments(self, waveform):
+        with self._lock:
+            return self._vad_segments(waveform)
+
+    def transcribe_segment(self, segment):
+        with self._lock:
+            return self._transcribe([segment])[0]
+
+    def _vad_segments(self, waveform):
+        res = self.model.inference(waveform, model=self.model.vad_model, kwargs=self.model.vad_kwargs, cache={})
+        return res[0]["value"]
+
+    def _transcribe(self, segments):
+        res = self.model.inference(segments, cache={}, batch_size=len(segments), **SEGMENT_KWARGS)
+        if len(res) != len(segments):
+            raise RuntimeError(f"ASR model returned {len(res)} results for {len(segments)} segments")
+        return [item["text"] for item in res]
+
+    def _transcribe_pooled(self, segments):
+        # 按长度排序后切批，每批补齐后的总长度不超过 batch_size_s，填充最少
+        max_samples = self.batch_size_s * SAMPLE_RATE
+        texts = [None] * len(segments)
+        batch = []
+        for i in sorted(range(len(segments)), key=lambda i: len(segments[i])):
+            if batch and (len(batch) + 1) * len(segments[i]) > max_samples:
+                for j, text in zip(batch, self._transcribe([segments[j] for j in batch])):
+                    texts[j] = text
+                batch = []
+            batch.append(i)
+        if batch:
+            for j, text in zip(batch, self._transcribe([segments[j] for j in batch])):
+                texts[j] = text
+        return texts
+
+    def warm_up(self, durations_s=WARMUP_DURATIONS_S):
+        # 合成噪声经过 VAD 得不到语音段，所以 VAD 和 ASR 分开预热：每个时长直接送进 ASR 模型，
+        # 再整批送一次，首个真实请求不再承担内核初始化和显存分配的开销
+        started = time.perf_counter()
+        rng = np.random.default_rng(0)
+        waveforms = [(rng.standard_normal(int(d * SAMPLE_RATE)) * 0.01).astype(np.float32) for d in durations_s]
+        with self._lock:
+            for waveform in waveforms:
+                self._vad_segments(waveform)
+                self._transcribe([waveform])
+            if len(waveforms) > 1:
+                self._transcribe(waveforms)
+        return time.perf_counter() - started
+
+
+def create_engine(model_dir, device, num_threads=None):
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    return ModelEngine(model_dir, device)
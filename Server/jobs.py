@@ -0,0 +1,158 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+import uuid
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+
+class QueueFullError(Exception):
+    def __init__(self, retry_after_s):
+        super().__init__("Job queue is full")
+        self.retry_after_s = retry_after_s
+
+
+class Job:
+    def __init__(self, audio, priority):
+        self.id = uuid.uuid4().hex
+        self.audio = audio
+        self.priority = priority
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.done_event = threading.Event()
+
+    def to_dict(self):
+        payload = {"job_id": self.id, "status": self.status, "priority": self.priority}
+        if self.status == DONE:
+            payload["text"] = self.result
+        elif self.status == FAILED:
+            payload["error"] = self.error
+        return payload
+
+
+class JobQueue:
+    def __init__(self, handler, max_queued=100, workers=4, result_ttl_s=600):
+        self.handler = handler
+        self.max_queued = max_queued
+        self.result_ttl_s = result_ttl_s
+        self._heap = []
+        self._jobs = {}
+        self._queued = 0
+        self._running = 0
+        self._seq = itertools.count()
+        self._avg_job_s = 1.0
+        self._cond = threading.Condition()
+        self._workers = max(1, workers)
+        self._threads = [
+            threading.Thread(target=self._run, name=f"asr-job-worker-{i}", daemon=True)
+            for i in range(self._workers)
+        ]
+        self._threads.append(threading.Thread(target=self._expire_loop, name="asr-job-janitor", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def is_full(self):
+        with self._cond:
+            return self._queued >= self.max_queued
+
+    def retry_after_s(self):
+        with self._cond:
+            return self._retry_after_s()
+
+    def _retry_after_s(self):
+        return max(1, math.ceil(self._avg_job_s * (self._queued + 1) / self._workers))
+
+    def submit(self, audio, priority=0):
+        job = Job(audio, priority)
+        with self._cond:
+            if self._queued >= self.max_queued:
+                raise QueueFullError(self._retry_after_s())
+            self._jobs[job.id] = job
+            # 优先级数值越大越先处理，同优先级按提交顺序
+            heapq.heappush(self._heap, (-priority, next(self._seq), job))
+            self._queued += 1
+            self._cond.notify()
+        return job
+
+    def get(self, job_id):
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id, timeout):
+        job = self.get(job_id)
+        if job is not None and timeout > 0:
+            job.done_event.wait(timeout)
+        return job
+
+    def cancel(self, job_id):
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                return job, False
+            self._queued -= 1
+            self._finish(job, CANCELLED)
+        job.audio.close()
+        return job, True
+
+    def stats(self):
+        with self._cond:
+            return {"queued": self._queued, "running": self._running, "jobs": len(self._jobs), "max_queued": self.max_queued}
+
+    def _finish(self, job, status, result=None, error=None):
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        job.done_event.set()
+
+    def _next_job(self):
+        with self._cond:
+            while True:
+                while not self._heap:
+                    self._cond.wait()
+                _, _, job = heapq.heappop(self._heap)
+                if job.status == QUEUED:
+                    job.status = RUNNING
+                    self._queued -= 1
+                    self._running += 1
+                    return job
+
+    def _run(self):
+        while True:
+            job = self._next_job()
+            started = time.monotonic()
+            try:
+                result = self.handler(job.audio)
+            except Exception as exc:
+                status, result, error = FAILED, None, str(exc)
+            else:
+                status, error = DONE, None
+            finally:
+                job.audio.close()
+            elapsed = time.monotonic() - started
+            with self._cond:
+                self._running -= 1
+                self._avg_job_s = 0.9 * self._avg_job_s + 0.1 * elapsed
+                self._finish(job, status, result, error)
+                job.audio = None
+
+    def _expire_loop(self):
+        interval = max(1.0, min(self.result_ttl_s / 2, 30.0))
+        while True:
+            time.sleep(interval)
+            cutoff = time.time() - self.result_ttl_s
+            with self._cond:
+                expired = [job_id for job_id, job in self._jobs.items()
+                           if job.status in FINISHED_STATES and job.finished_at < cutoff]
+                for job_id in expired:
+                    del self._jobs[job_id]
@@ -0,0 +1,184 @@
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_family(name, metric_type, help_text, samples):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    for sample_name, labels, value in samples:
+        lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+    return lines
+
+
+class _Metric:
+    metric_type = None
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(labels):
+        return tuple(sorted(labels.items()))
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in sorted(self._values.items())]
+
+    def render(self):
+        return render_family(self.name, self.metric_type, self.help_text, self.samples())
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Counter):
+    metric_type = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(buckets) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, counts):
+                    samples.append((f"{self.name}_bucket", key + (("le", _format_value(bound)),), count))
+                samples.append((f"{self.name}_sum", key, total))
+                samples.append((f"{self.name}_count", key, counts[-1]))
+        return samples
+
+
+class StageTimer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name, elapsed):
+        self.stages[name] = self.stages.get(name, 0.0) + elapsed
+        self.histogram.observe(elapsed, stage=name)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text):
+        return self._register(Counter(name, help_text))
+
+    def gauge(self, name, help_text):
+        return self._register(Gauge(name, help_text))
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, buckets))
+
+    def collector(self, collect):
+        self._collectors.append(collect)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            for name, metric_type, help_text, samples in collect():
+                lines.extend(render_family(name, metric_type, help_text, samples))
+        return "\n".join(lines) + "\n"
+
+
+class ServiceMetrics:
+    def __init__(self):
+        self.registry = MetricsRegistry()
+        self.requests = self.registry.counter("asr_requests_total", "HTTP requests handled, by endpoint and status code.")
+        self.errors = self.registry.counter("asr_request_errors_total", "HTTP requests that failed with a server error.")
+        self.in_flight = self.registry.gauge("asr_requests_in_flight", "HTTP requests currently being handled.")
+        self.request_seconds = self.registry.histogram("asr_request_seconds", "End-to-end request latency in seconds.")
+        self.stage_seconds = self.registry.histogram("asr_stage_seconds", "Latency of each processing stage in seconds.")
+        self.batch_seconds = self.registry.histogram("asr_batch_seconds", "Latency of one model generate call in seconds.")
+        self.batch_size = self.registry.histogram("asr_batch_size", "Number of inputs per model generate call.",
+                                                  buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+        self.audio_seconds = self.registry.counter("asr_audio_seconds_total", "Seconds of audio transcribed by the model.")
+        self.processing_seconds = self.registry.counter("asr_processing_seconds_total", "Seconds spent in model VAD and ASR calls, counted once per call.")
+        self.real_time_factor = self.registry.gauge("asr_real_time_factor", "Cumulative processing seconds per audio second.")
+        self._rtf_lock = threading.Lock()
+
+    def timer(self):
+        return StageTimer(self.stage_seconds)
+
+    def record_inference(self, audio_s, processing_s):
+        with self._rtf_lock:
+            self.audio_seconds.inc(audio_s)
+            self.processing_seconds.inc(processing_s)
+            total_audio = self.audio_seconds.value()
+            if total_audio > 0:
+                self.real_time_factor.set(self.processing_seconds.value() / total_audio)
+
+    def record_batch(self, size, elapsed):
+        self.batch_size.observe(size)
+        self.batch_seconds.observe(elapsed)
+
+    def render(self):
+        return self.registry.render()
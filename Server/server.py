@@ -1,84 +1,559 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Request, Response, g, request, jsonify
+import argparse
+import itertools
+import json
 import os
-from funasr import AutoModel
+import signal
+import sys
+import threading
+import time
+import traceback
 from funasr.utils.postprocess_utils import rich_transcription_postprocess
+from batching import BatchScheduler
+from audio import SAMPLE_RATE, iter_archive, load_upload, open_upload_stream
+from cache import TranscriptionCache
+from engine import GENERATE_KWARGS, WARMUP_DURATIONS_S, create_engine, default_device, load_waveform
+from jobs import QueueFullError, JobQueue
+from metrics import ServiceMetrics
+from workers import WorkerPool
 
 MODEL_DIR = "iic/SenseVoiceSmall"
-DEVICE = "cuda:0"
 TMP_DIR = "/tmp"
+INFERENCE_ENDPOINTS = ("process_audio", "process_audio_batch", "process_audio_stream", "submit_job")
 
 
 class ASRService:
-    def __init__(self, model_dir, device, tmp_dir, port=5000):
+    def __init__(self, model_dir, device, tmp_dir, port=5000,
+                 batch_window_ms=10, max_batch_size=8, max_batch_audio_s=300,
+                 spool_threshold_mb=20, cache_mb=64, cache_db=None,
+                 workers=0, devices=None, threads_per_worker=None,
+                 job_queue_size=100, job_workers=4, job_ttl_s=600,
+                 warmup_durations_s=WARMUP_DURATIONS_S):
         self.model_dir = model_dir
         self.device = device
         self.tmp_dir = tmp_dir
         self.port = port
-        self.model = self._initialize_model()
+        self.spool_threshold_bytes = int(spool_threshold_mb * 1024 * 1024)
+        self.warmup_durations_s = tuple(warmup_durations_s)
+        self.metrics = ServiceMetrics()
+        # 模型在 start_loading() 启动的后台线程中加载，就绪之前推理接口返回 503
+        self.engine = None
+        self.batcher = None
+        self._engine_options = (workers, devices or [device], threads_per_worker)
+        self._batch_options = (batch_window_ms, max_batch_size, max_batch_audio_s)
+        self._created_at = time.perf_counter()
+        self._ready = threading.Event()
+        self.startup = {"state": "starting"}
+        self.cache = self._initialize_cache(cache_mb, cache_db)
+        self.jobs = JobQueue(self._generate_text, max_queued=job_queue_size, workers=job_workers, result_ttl_s=job_ttl_s)
         self.app = Flask(__name__)
         self._configure_app()
         self._setup_routes()
 
-    def _initialize_model(self):
-        return AutoModel(
-            model=self.model_dir,
-            vad_model="fsmn-vad",
-            vad_kwargs={"max_single_segment_time": 30000},
-            device=self.device,
-            disable_update=True,
+    def _initialize_engine(self, workers, devices, threads_per_worker):
+        if workers <= 0:
+            return create_engine(self.model_dir, self.device, threads_per_worker)
+        worker_devices = [devices[i % len(devices)] for i in range(workers)]
+        return WorkerPool(create_engine, self.model_dir, worker_devices, threads_per_worker=threads_per_worker,
+                          warmup_durations_s=self.warmup_durations_s)
+
+    def start_loading(self):
+        print(f"Loading {self.model_dir} on {self.device} in the background")
+        thread = threading.Thread(target=self._load_model, name="asr-model-loader", daemon=True)
+        thread.start()
+        return thread
+
+    def _load_model(self):
+        try:
+            started = time.perf_counter()
+            self.startup["state"] = "loading"
+            engine = self._initialize_engine(*self._engine_options)
+            if isinstance(engine, WorkerPool):
+                # 进程池中每个进程自己加载并预热，这里等待所有进程就绪或失败
+                if engine.wait_ready() == 0:
+                    raise RuntimeError("No ASR worker started successfully")
+                workers = [worker for worker in engine.status() if worker["ready"]]
+                load_s = max(worker["load_s"] for worker in workers)
+                warmup_s = max(worker["warmup_s"] for worker in workers)
+            else:
+                load_s = time.perf_counter() - started
+                print(f"Model loaded in {load_s:.1f}s, warming up with {list(self.warmup_durations_s)}s clips")
+                self.startup.update(state="warming_up", load_s=round(load_s, 3))
+                warmup_s = engine.warm_up(self.warmup_durations_s) if self.warmup_durations_s else 0.0
+            self.engine = engine
+            self.batcher = self._initialize_batcher(*self._batch_options)
+        except Exception as exc:
+            self.startup.update(state="failed", error=f"{type(exc).__name__}: {exc}")
+            print(f"ASRService failed to start:\n{traceback.format_exc()}")
+            return
+        startup_s = time.perf_counter() - self._created_at
+        self.startup.update(state="ready", load_s=round(load_s, 3), warmup_s=round(warmup_s, 3), startup_s=round(startup_s, 3))
+        print(f"ASRService ready in {startup_s:.1f}s (load {load_s:.1f}s, warm-up {warmup_s:.1f}s)")
+        self._ready.set()
+
+    def is_ready(self):
+        return self._ready.is_set() and getattr(self.engine, "available", True)
+
+    def wait_until_ready(self, timeout=None):
+        return self._ready.wait(timeout)
+
+    def readiness(self):
+        payload = dict(self.startup, ready=self.is_ready(), model=self.model_dir, device=self.device,
+                       uptime_s=round(time.perf_counter() - self._created_at, 3))
+        if isinstance(self.engine, WorkerPool):
+            payload["workers"] = self.engine.status()
+        return payload
+
+    def _initialize_batcher(self, window_ms, max_batch_size, max_batch_audio_s):
+        if max_batch_size <= 1:
+            return None
+        return BatchScheduler(
+            self._generate_batch,
+            window_ms=window_ms,
+            max_batch_size=max_batch_size,
+            max_batch_audio_s=max_batch_audio_s,
+            concurrency=getattr(self.engine, "size", 1),
         )
 
+    def _initialize_cache(self, cache_mb, cache_db):
+        if cache_mb <= 0 and not cache_db:
+            return None
+        return TranscriptionCache(max_bytes=int(max(cache_mb, 0) * 1024 * 1024), db_path=cache_db)
+
+    def _cache_key(self, audio):
+        if self.cache is None or audio.digest is None:
+            return None
+        return self.cache.make_key(audio.digest, dict(GENERATE_KWARGS, model=self.model_dir))
+
     def _configure_app(self):
         self.app.config.update(
             SERVICE_NAME='ASR Service',
             SERVICE_DESCRIPTION='A service for converting speech to text using ASR models.'
         )
+        self.app.request_class = self._make_request_class()
+        self.app.before_request(self._before_request)
+        self.app.after_request(self._after_request)
+        self.app.teardown_request(self._teardown_request)
+        self.metrics.registry.collector(self._collect_runtime_metrics)
 
-    def _save_file(self, file):
-        file_path = os.path.join(self.tmp_dir, file.filename)
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        file.save(file_path)
-        return file_path
-
-    def _generate_text(self, file_path):
-        res = self.model.generate(
-            input=file_path,
-            cache={},
-            language="auto",
-            use_itn=True,
-            batch_size_s=60,
-            merge_vad=True,
-            merge_length_s=15,
-        )
-        return rich_transcription_postprocess(res[0]["text"])
+    def _before_request(self):
+        g.started_at = time.perf_counter()
+        g.counted = False
+        self.metrics.in_flight.inc()
+        if request.endpoint in INFERENCE_ENDPOINTS and not self.is_ready():
+            return self._not_ready_response()
+
+    def _after_request(self, response):
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        self.metrics.requests.inc(endpoint=endpoint, status=response.status_code)
+        # 模型未就绪时的 503 是预期的就绪状态，不计入错误
+        if response.status_code >= 500 and not g.get("not_ready"):
+            self.metrics.errors.inc(endpoint=endpoint)
+        g.counted = True
+        if response.is_streamed:
+            # 流式响应在 teardown 之后才发送完，等响应关闭时再结束计时和 in_flight
+            started_at = g.started_at
+            response.call_on_close(lambda: self._finish_request(endpoint, started_at))
+            g.deferred = True
+        else:
+            self.metrics.request_seconds.observe(time.perf_counter() - g.started_at, endpoint=endpoint)
+        return response
+
+    def _finish_request(self, endpoint, started_at):
+        self.metrics.request_seconds.observe(time.perf_counter() - started_at, endpoint=endpoint)
+        self.metrics.in_flight.dec()
+
+    def _teardown_request(self, exc):
+        if "started_at" not in g:
+            return
+        if not g.get("deferred"):
+            self.metrics.in_flight.dec()
+        if not g.counted:
+            endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+            self.metrics.requests.inc(endpoint=endpoint, status=500)
+            self.metrics.errors.inc(endpoint=endpoint)
+
+    def _collect_runtime_metrics(self):
+        yield ("asr_ready", "gauge", "Whether the model is loaded, warmed up and accepting requests.",
+               [("asr_ready", (), int(self.is_ready()))])
+        phases = [("load", self.startup.get("load_s")), ("warmup", self.startup.get("warmup_s")), ("total", self.startup.get("startup_s"))]
+        yield ("asr_startup_seconds", "gauge", "Time spent in each startup phase.",
+               [("asr_startup_seconds", (("phase", phase),), value) for phase, value in phases if value is not None])
+        jobs = self.jobs.stats()
+        yield ("asr_jobs", "gauge", "Jobs in the asynchronous job queue, by state.",
+               [("asr_jobs", (("state", "queued"),), jobs["queued"]),
+                ("asr_jobs", (("state", "running"),), jobs["running"])])
+        if self.cache is not None:
+            cache = self.cache.stats()
+            yield ("asr_cache_hits_total", "counter", "Transcription cache hits, by layer.",
+                   [("asr_cache_hits_total", (("layer", "memory"),), cache["memory_hits"]),
+                    ("asr_cache_hits_total", (("layer", "disk"),), cache["disk_hits"])])
+            yield ("asr_cache_misses_total", "counter", "Transcription cache misses.",
+                   [("asr_cache_misses_total", (), cache["misses"])])
+            yield ("asr_cache_bytes", "gauge", "Bytes held by the in-memory transcription cache.",
+                   [("asr_cache_bytes", (), cache["bytes"])])
+
+    def _make_request_class(self):
+        tmp_dir = self.tmp_dir
+        spool_threshold_bytes = self.spool_threshold_bytes
+
+        class UploadRequest(Request):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.upload_paths = []
+
+            def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+                size = content_length if content_length is not None else total_content_length
+                stream = open_upload_stream(tmp_dir, spool_threshold_bytes, size, filename)
+                if isinstance(getattr(stream, "name", None), str):
+                    self.upload_paths.append(stream.name)
+                return stream
+
+            def close(self):
+                super().close()
+                # 没有被 load_upload 接管的上传文件（压缩包本身、出错的请求等）随请求一起删除
+                for path in self.upload_paths:
+                    if os.path.exists(path):
+                        os.remove(path)
+
+        return UploadRequest
+
+    def _generate_batch(self, inputs):
+        started = time.perf_counter()
+        texts, stages, audio_s = self.engine.generate(inputs)
+        self.metrics.record_batch(len(inputs), time.perf_counter() - started)
+        # 处理时间和音频时长按模型调用统计，同一批次里的多个请求不会重复计入
+        self.metrics.record_inference(audio_s, stages["vad"] + stages["asr"])
+        return [(text, stages) for text in texts]
+
+    def _record_model_stages(self, timer, stage_list, elapsed):
+        # 同一次模型调用只计一次；其余时间花在调度队列和模型锁的等待上
+        calls = list({id(stages): stages for stages in stage_list}.values())
+        busy = 0.0
+        for name in ("decode", "vad", "asr"):
+            spent = sum(stages[name] for stages in calls)
+            timer.record(name, spent)
+            busy += spent
+        timer.record("queue", max(0.0, elapsed - busy))
+
+    def _generate_text(self, audio, timer=None):
+        timer = timer or self.metrics.timer()
+        cache_key = self._cache_key(audio)
+        if cache_key is not None:
+            with timer.stage("cache"):
+                text = self.cache.get(cache_key)
+            if text is not None:
+                return text
+        started = time.perf_counter()
+        if self.batcher is None:
+            raw_text, stages = self._generate_batch([audio.data])[0]
+        else:
+            raw_text, stages = self.batcher.submit(audio.data, audio.duration).result()
+        self._record_model_stages(timer, [stages], time.perf_counter() - started)
+        with timer.stage("postprocess"):
+            text = rich_transcription_postprocess(raw_text)
+        if cache_key is not None:
+            self.cache.put(cache_key, text)
+        return text
+
+    def _generate_texts(self, audios, timer=None):
+        timer = timer or self.metrics.timer()
+        results = [None] * len(audios)
+        keys = [self._cache_key(audio) for audio in audios]
+        pending = []
+        with timer.stage("cache"):
+            for i, key in enumerate(keys):
+                text = self.cache.get(key) if key is not None else None
+                if text is None:
+                    pending.append(i)
+                else:
+                    results[i] = text
+        if not pending:
+            return results
+        started = time.perf_counter()
+        outputs = []
+        # 经过调度器按 max_batch_size / max_batch_audio_s 切批，每次只提交一个批次的量，
+        # 大批量请求不会一次占住模型锁，其他请求可以插在两批之间
+        chunk_size = self.batcher.max_batch_size if self.batcher is not None else 1
+        for start in range(0, len(pending), chunk_size):
+            chunk = pending[start:start + chunk_size]
+            futures = None
+            if self.batcher is not None:
+                futures = [self.batcher.submit(audios[i].data, audios[i].duration) for i in chunk]
+            for n, i in enumerate(chunk):
+                try:
+                    outputs.append(futures[n].result() if futures is not None else self._generate_batch([audios[i].data])[0])
+                except Exception as exc:
+                    outputs.append((exc, None))
+        self._record_model_stages(timer, [stages for _, stages in outputs if stages is not None], time.perf_counter() - started)
+        texts = [text for text, _ in outputs]
+        with timer.stage("postprocess"):
+            for i, text in zip(pending, texts):
+                if not isinstance(text, Exception):
+                    text = rich_transcription_postprocess(text)
+                    if keys[i] is not None:
+                        self.cache.put(keys[i], text)
+                results[i] = text
+        return results
+
+    def _load_waveform(self, audio):
+        return load_waveform(audio.data)
+
+    def _stream_segments(self, waveform, timer=None):
+        timer = timer or self.metrics.timer()
+        started = time.perf_counter()
+        with timer.stage("vad"):
+            segments = self.engine.vad_segments(waveform)
+        self.metrics.record_inference(len(waveform) / SAMPLE_RATE, time.perf_counter() - started)
+        for start_ms, end_ms in segments:
+            segment = waveform[int(start_ms * SAMPLE_RATE / 1000):int(end_ms * SAMPLE_RATE / 1000)]
+            started = time.perf_counter()
+            with timer.stage("asr"):
+                raw_text = self.engine.transcribe_segment(segment)
+            self.metrics.record_inference(0.0, time.perf_counter() - started)
+            with timer.stage("postprocess"):
+                text = rich_transcription_postprocess(raw_text)
+            yield {"start": start_ms / 1000, "end": end_ms / 1000, "text": text}
+
+    def _format_event(self, payload, use_sse):
+        line = json.dumps(payload, ensure_ascii=False)
+        return f"data: {line}\n\n" if use_sse else f"{line}\n"
 
     def _setup_routes(self):
         @self.app.route('/process_audio', methods=['POST'])
         def process_audio():
-            if 'file' not in request.files or request.files['file'].filename == '':
+            timer = self.metrics.timer()
+            with timer.stage("receive"):
+                files = request.files
+            if 'file' not in files or files['file'].filename == '':
                 return jsonify({"error": "No file part or no selected file"}), 400
 
-            file_path = self._save_file(request.files['file'])
             try:
-                text = self._generate_text(file_path)
+                with timer.stage("decode"):
+                    audio = load_upload(files['file'], self.tmp_dir, self.spool_threshold_bytes)
+            except ValueError as exc:
+                return jsonify({"error": str(exc)}), 400
+            with audio:
+                text = self._generate_text(audio, timer)
+
+            payload = {"text": text}
+            if self._profile_requested():
+                payload["profile"] = timer.stages
+            return jsonify(payload)
+
+        @self.app.route('/process_audio_batch', methods=['POST'])
+        def process_audio_batch():
+            timer = self.metrics.timer()
+            with timer.stage("receive"):
+                uploads = [(f.filename, f) for f in request.files.getlist('files') if f.filename]
+            archive = request.files.get('archive')
+            if archive is not None and archive.filename:
+                uploads = itertools.chain(uploads, iter_archive(archive))
+
+            results = {}
+            names = []
+            audios = []
+            try:
+                for filename, upload in uploads:
+                    name = filename
+                    suffix = 2
+                    while name in results or name in names:
+                        name = f"{filename}#{suffix}"
+                        suffix += 1
+                    if isinstance(upload, Exception):
+                        results[name] = {"error": str(upload)}
+                        continue
+                    try:
+                        with timer.stage("decode"):
+                            audios.append(load_upload(upload, self.tmp_dir, self.spool_threshold_bytes))
+                        names.append(name)
+                    except Exception as exc:
+                        results[name] = {"error": str(exc)}
+                if not names and not results:
+                    return jsonify({"error": "No files in request"}), 400
+                for name, text in zip(names, self._generate_texts(audios, timer)):
+                    results[name] = {"error": str(text)} if isinstance(text, Exception) else {"text": text}
+            except ValueError as exc:
+                return jsonify({"error": str(exc)}), 400
             finally:
-                os.remove(file_path)
+                for audio in audios:
+                    audio.close()
 
-            return jsonify({"text": text})
+            payload = {"results": results}
+            if self._profile_requested():
+                payload["profile"] = timer.stages
+            return jsonify(payload)
+
+        @self.app.route('/process_audio_stream', methods=['POST'])
+        def process_audio_stream():
+            if 'file' not in request.files or request.files['file'].filename == '':
+                return jsonify({"error": "No file part or no selected file"}), 400
+
+            use_sse = (request.args.get('format') == 'sse' or
+                       request.accept_mimetypes.best_match(['application/x-ndjson', 'text/event-stream']) == 'text/event-stream')
+            try:
+                audio = load_upload(request.files['file'], self.tmp_dir, self.spool_threshold_bytes)
+            except ValueError as exc:
+                return jsonify({"error": str(exc)}), 400
+            # 在开始流式响应之前解码，无法解码的文件直接返回 400，而不是 200 加流内错误
+            try:
+                with audio:
+                    waveform = self._load_waveform(audio)
+            except Exception as exc:
+                return jsonify({"error": f"Could not decode audio: {exc}"}), 400
+
+            def generate():
+                try:
+                    count = 0
+                    for segment in self._stream_segments(waveform):
+                        count += 1
+                        yield self._format_event(segment, use_sse)
+                    yield self._format_event({"done": True, "segments": count}, use_sse)
+                except Exception as exc:
+                    yield self._format_event({"error": str(exc)}, use_sse)
+
+            mimetype = 'text/event-stream' if use_sse else 'application/x-ndjson'
+            return Response(generate(), mimetype=mimetype, headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+        @self.app.route('/jobs', methods=['POST'])
+        def submit_job():
+            if 'file' not in request.files or request.files['file'].filename == '':
+                return jsonify({"error": "No file part or no selected file"}), 400
+            try:
+                priority = int(request.form.get('priority', request.args.get('priority', 0)))
+            except ValueError:
+                return jsonify({"error": "priority must be an integer"}), 400
+            if self.jobs.is_full():
+                return self._queue_full_response(self.jobs.retry_after_s())
+
+            try:
+                audio = load_upload(request.files['file'], self.tmp_dir, self.spool_threshold_bytes)
+            except ValueError as exc:
+                return jsonify({"error": str(exc)}), 400
+            try:
+                job = self.jobs.submit(audio, priority)
+            except QueueFullError as exc:
+                audio.close()
+                return self._queue_full_response(exc.retry_after_s)
+
+            return jsonify(job.to_dict()), 202, {"Location": f"/jobs/{job.id}"}
+
+        @self.app.route('/jobs/<job_id>', methods=['GET'])
+        def get_job(job_id):
+            try:
+                wait = min(max(float(request.args.get('wait', 0)), 0), 60)
+            except ValueError:
+                return jsonify({"error": "wait must be a number of seconds"}), 400
+            job = self.jobs.wait(job_id, wait)
+            if job is None:
+                return jsonify({"error": "Unknown or expired job"}), 404
+            return jsonify(job.to_dict())
+
+        @self.app.route('/jobs/<job_id>', methods=['DELETE'])
+        def cancel_job(job_id):
+            job, cancelled = self.jobs.cancel(job_id)
+            if job is None:
+                return jsonify({"error": "Unknown or expired job"}), 404
+            if not cancelled:
+                return jsonify(dict(job.to_dict(), error="Only queued jobs can be cancelled")), 409
+            return jsonify(job.to_dict())
 
         @self.app.route('/check_connection', methods=['GET'])
         def check_connection():
+            if not self.is_ready():
+                g.not_ready = True
+                return jsonify({"status": self.startup["state"], "message": "Model is not ready"}), 503
             return jsonify({"status": "success", "message": "Connection successful"}), 200
 
+        @self.app.route('/healthz', methods=['GET'])
+        def healthz():
+            # 存活检查只反映进程状态；模型加载失败时重启进程才有意义
+            failed = self.startup["state"] == "failed"
+            payload = {"status": "failed" if failed else "alive", "uptime_s": round(time.perf_counter() - self._created_at, 3)}
+            return jsonify(payload), 503 if failed else 200
+
+        @self.app.route('/readyz', methods=['GET'])
+        def readyz():
+            payload = self.readiness()
+            g.not_ready = not payload["ready"]
+            return jsonify(payload), 200 if payload["ready"] else 503
+
+        @self.app.route('/metrics', methods=['GET'])
+        def metrics():
+            return Response(self.metrics.render(), mimetype='text/plain; version=0.0.4')
+
+        @self.app.route('/cache_stats', methods=['GET'])
+        def cache_stats():
+            if self.cache is None:
+                return jsonify({"enabled": False})
+            return jsonify(dict(self.cache.stats(), enabled=True))
+
+    def _profile_requested(self):
+        return request.args.get('profile', '').lower() in ('1', 'true', 'yes')
+
+    def _not_ready_response(self):
+        g.not_ready = True
+        state = self.startup["state"]
+        headers = {} if state == "failed" else {"Retry-After": "5"}
+        return jsonify({"error": "Model is not ready", "status": state}), 503, headers
+
+    def _queue_full_response(self, retry_after_s):
+        return jsonify({"error": "Job queue is full, retry later"}), 429, {"Retry-After": str(retry_after_s)}
+
+    def shutdown(self):
+        if isinstance(self.engine, WorkerPool):
+            self.engine.close()
+
     def start_server(self):
-        self.app.run(host='0.0.0.0', port=self.port)
+        # SIGTERM 时正常退出并关闭推理子进程，滚动重启不会留下占用显存的孤儿进程
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        self.start_loading()
+        try:
+            self.app.run(host='0.0.0.0', port=self.port)
+        finally:
+            self.shutdown()
 
-if __name__ == "__main__":
-    import argparse
 
+def main(argv=None):
     parser = argparse.ArgumentParser(description="ASR Service")
     parser.add_argument('--port', type=int, default=5000, help='Port to run the server on')
-    args = parser.parse_args()
+    parser.add_argument('--device', default=None, help='Device for the model (defaults to cuda:0 when available, otherwise cpu)')
+    parser.add_argument('--workers', type=int, default=0, help='Number of inference worker processes (0 runs the model in the server process)')
+    parser.add_argument('--devices', default=None, help='Comma separated devices assigned to workers round-robin, e.g. cuda:0,cuda:1')
+    parser.add_argument('--threads-per-worker', type=int, default=None, help='Torch thread cap for each model instance')
+    parser.add_argument('--batch-window-ms', type=float, default=10, help='How long to wait for more requests before running a batch')
+    parser.add_argument('--max-batch-size', type=int, default=8, help='Maximum number of requests per batch (1 disables batching)')
+    parser.add_argument('--max-batch-audio-s', type=float, default=300, help='Maximum total audio seconds per batch')
+    parser.add_argument('--spool-threshold-mb', type=float, default=20, help='Uploads larger than this are spooled to disk instead of decoded in memory')
+    parser.add_argument('--cache-mb', type=float, default=64, help='Size of the in-memory transcription cache (0 disables it)')
+    parser.add_argument('--cache-db', default=None, help='Optional SQLite file that persists the transcription cache across restarts')
+    parser.add_argument('--job-queue-size', type=int, default=100, help='Maximum number of queued jobs before /jobs answers 429')
+    parser.add_argument('--job-workers', type=int, default=4, help='Number of jobs processed concurrently')
+    parser.add_argument('--job-ttl-s', type=float, default=600, help='How long finished job results are kept')
+    parser.add_argument('--warmup-durations-s', default=",".join(str(d) for d in WARMUP_DURATIONS_S),
+                        help='Comma separated synthetic clip lengths run through the model before accepting traffic (empty disables warm-up)')
+    args = parser.parse_args(argv)
 
-    asr_service = ASRService(MODEL_DIR, DEVICE, TMP_DIR, port=args.port)
-    asr_service.start_server()
\ No newline at end of file
+    device = args.device or default_device()
+    devices = args.devices.split(',') if args.devices else None
+    asr_service = ASRService(
+        MODEL_DIR, device, TMP_DIR, port=args.port,
+        batch_window_ms=args.batch_window_ms,
+        max_batch_size=args.max_batch_size,
+        max_batch_audio_s=args.max_batch_audio_s,
+        spool_threshold_mb=args.spool_threshold_mb,
+        cache_mb=args.cache_mb,
+        cache_db=args.cache_db,
+        workers=args.workers,
+        devices=devices,
+        threads_per_worker=args.threads_per_worker,
+        job_queue_size=args.job_queue_size,
+        job_workers=args.job_workers,
+        job_ttl_s=args.job_ttl_s,
+        warmup_durations_s=[float(d) for d in args.warmup_durations_s.split(',') if d.strip()],
+    )
+    asr_service.start_server()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import threading
+import time
+import unittest
+from batching import BatchScheduler
+
+
+class RecordingProcessor:
+    def __init__(self, delay_s=0.0, fail_on=None, drop_last=False):
+        self.delay_s = delay_s
+        self.fail_on = fail_on
+        self.drop_last = drop_last
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, inputs):
+        with self.lock:
+            self.calls.append(list(inputs))
+        time.sleep(self.delay_s)
+        if self.fail_on is not None and self.fail_on in inputs:
+            raise ValueError(f"bad input {self.fail_on}")
+        results = [f"text-{item}" for item in inputs]
+        return results[:-1] if self.drop_last else results
+
+
+class BatchSchedulerTest(unittest.TestCase):
+    def make(self, processor, **kwargs):
+        scheduler = BatchScheduler(processor, **kwargs)
+        self.addCleanup(scheduler.close)
+        return scheduler
+
+    def test_requests_within_window_share_one_call(self):
+        processor = RecordingProcessor()
+        scheduler = self.make(processor, window_ms=200, max_batch_size=4)
+        futures = [scheduler.submit(i, 1.0) for i in range(4)]
+        self.assertEqual([f.result(timeout=2) for f in futures], [f"text-{i}" for i in range(4)])
+        self.assertEqual(processor.calls, [[0, 1, 2, 3]])
+
+    def test_max_batch_size_splits_batches(self):
+        processor = RecordingProcessor()
+        scheduler = self.make(processor, window_ms=100, max_batch_size=3)
+        futures = [scheduler.submit(i, 1.0) for i in range(7)]
+        for future in futures:
+            future.result(timeout=2)
+        self.assertEqual([len(call) for call in processor.calls], [3, 3, 1])
+
+    def test_max_batch_audio_limits_batch(self):
+        processor = RecordingProcessor()
+        scheduler = self.make(processor, window_ms=100, max_batch_size=10, max_batch_audio_s=10)
+        futures = [scheduler.submit(i, 4.0) for i in range(5)]
+        for future in futures:
+            future.result(timeout=2)
+        self.assertEqual([len(call) for call in processor.calls], [2, 2, 1])
+
+    def test_full_batch_is_dispatched_before_window_ends(self):
+        processor = RecordingProcessor()
+        scheduler = self.make(processor, window_ms=5000, max_batch_size=2)
+        started = time.monotonic()
+        futures = [scheduler.submit(i, 1.0) for i in range(2)]
+        for future in futures:
+            future.result(timeout=2)
+        self.assertLess(time.monotonic() - started, 1.0)
+
+    def test_failed_batch_is_retried_item_by_item(self):
+        processor = RecordingProcessor(fail_on=2)
+        scheduler = self.make(processor, window_ms=200, max_batch_size=4)
+        futures = [scheduler.submit(i, 1.0) for i in range(4)]
+        for i, future in enumerate(futures):
+            if i == 2:
+                with self.assertRaises(ValueError):
+                    future.result(timeout=2)
+            else:
+                self.assertEqual(future.result(timeout=2), f"text-{i}")
+        self.assertEqual(processor.calls[0], [0, 1, 2, 3])
+        self.assertEqual(sorted(map(tuple, processor.calls[1:])), [(0,), (1,), (2,), (3,)])
+
+    def test_short_result_list_fails_whole_batch(self):
+        processor = RecordingProcessor(drop_last=True)
+        scheduler = self.make(processor, window_ms=200, max_batch_size=3)
+        futures = [scheduler.submit(i, 1.0) for i in range(3)]
+        for future in futures:
+            with self.assertRaises(RuntimeError):
+                future.result(timeout=2)
+
+    def test_multiple_dispatchers_complete_every_request(self):
+        processor = RecordingProcessor(delay_s=0.01)
+        scheduler = self.make(processor, window_ms=5, max_batch_size=4, concurrency=3)
+        futures = []
+        threads = [threading.Thread(target=lambda n=n: futures.extend(scheduler.submit(n * 100 + i, 0.5) for i in range(25)))
+                   for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len([f.result(timeout=5) for f in futures]), 100)
+        self.assertEqual(sum(len(call) for call in processor.calls), 100)
+
+    def test_cancelled_request_is_skipped(self):
+        processor = RecordingProcessor()
+        scheduler = self.make(processor, window_ms=200, max_batch_size=4)
+        futures = [scheduler.submit(i, 1.0) for i in range(3)]
+        self.assertTrue(futures[1].cancel())
+        self.assertEqual(futures[0].result(timeout=2), "text-0")
+        self.assertEqual(futures[2].result(timeout=2), "text-2")
+        self.assertEqual(processor.calls, [[0, 2]])
+
+    def test_submit_after_close_raises(self):
+        scheduler = BatchScheduler(RecordingProcessor())
+        scheduler.close()
+        with self.assertRaises(RuntimeError):
+            scheduler.submit(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from cache import TranscriptionCache
+
+
+class TranscriptionCacheTest(unittest.TestCase):
+    def entry_size(self, key, text):
+        return len(key) + len(text.encode("utf-8"))
+
+    def test_make_key_depends_on_params(self):
+        key = TranscriptionCache.make_key("abc", {"language": "auto", "use_itn": True})
+        self.assertEqual(key, TranscriptionCache.make_key("abc", {"use_itn": True, "language": "auto"}))
+        self.assertNotEqual(key, TranscriptionCache.make_key("abc", {"language": "zh", "use_itn": True}))
+        self.assertNotEqual(key, TranscriptionCache.make_key("abd", {"language": "auto", "use_itn": True}))
+
+    def test_miss_then_hit(self):
+        cache = TranscriptionCache()
+        self.assertIsNone(cache.get("k"))
+        cache.put("k", "你好")
+        self.assertEqual(cache.get("k"), "你好")
+        stats = cache.stats()
+        self.assertEqual((stats["misses"], stats["memory_hits"]), (1, 1))
+        self.assertEqual(stats["bytes"], self.entry_size("k", "你好"))
+
+    def test_evicts_least_recently_used_by_bytes(self):
+        cache = TranscriptionCache(max_bytes=3 * self.entry_size("k0", "x" * 10))
+        for i in range(3):
+            cache.put(f"k{i}", "x" * 10)
+        cache.get("k0")
+        cache.put("k3", "x" * 10)
+        self.assertIsNone(cache.get("k1"))
+        for key in ("k0", "k2", "k3"):
+            self.assertIsNotNone(cache.get(key))
+        self.assertLessEqual(cache.stats()["bytes"], cache.max_bytes)
+
+    def test_replacing_entry_updates_size(self):
+        cache = TranscriptionCache()
+        cache.put("k", "short")
+        cache.put("k", "a much longer transcript")
+        self.assertEqual(cache.stats()["bytes"], self.entry_size("k", "a much longer transcript"))
+        self.assertEqual(cache.stats()["entries"], 1)
+
+    def test_oversized_entry_is_not_kept_in_memory(self):
+        cache = TranscriptionCache(max_bytes=10)
+        cache.put("k", "x" * 100)
+        self.assertEqual(cache.stats()["entries"], 0)
+        self.assertIsNone(cache.get("k"))
+
+    def test_sqlite_layer_survives_restart(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "cache.db")
+            TranscriptionCache(db_path=db_path).put("k", "你好")
+            cache = TranscriptionCache(db_path=db_path)
+            self.assertEqual(cache.get("k"), "你好")
+            self.assertEqual(cache.get("k"), "你好")
+            stats = cache.stats()
+            self.assertEqual((stats["disk_hits"], stats["memory_hits"]), (1, 1))
+            cache._db.close()
+
+    def test_sqlite_only_cache_keeps_entries_on_disk(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = TranscriptionCache(max_bytes=0, db_path=os.path.join(tmp, "cache.db"))
+            cache.put("k", "text")
+            self.assertEqual(cache.stats()["entries"], 0)
+            self.assertEqual(cache.get("k"), "text")
+            self.assertEqual(cache.stats()["disk_hits"], 1)
+            cache._db.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
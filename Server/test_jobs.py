@@ -0,0 +1,115 @@
+import threading
+import time
+import unittest
+from jobs import CANCELLED, DONE, FAILED, QUEUED, JobQueue, QueueFullError
+
+
+class FakeAudio:
+    def __init__(self, name):
+        self.name = name
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class GatedHandler:
+    def __init__(self):
+        self.gate = threading.Event()
+        self.started = threading.Event()
+        self.order = []
+
+    def __call__(self, audio):
+        self.started.set()
+        self.gate.wait(5)
+        self.order.append(audio.name)
+        if audio.name == "bad":
+            raise ValueError("cannot decode")
+        return f"text-{audio.name}"
+
+
+class JobQueueTest(unittest.TestCase):
+    def make(self, handler, **kwargs):
+        # 单个工作线程，先提交一个阻塞任务占住它，后续任务都停留在队列中
+        jobs = JobQueue(handler, workers=1, **kwargs)
+        blocker = jobs.submit(FakeAudio("blocker"))
+        self.assertTrue(handler.started.wait(2))
+        return jobs, blocker
+
+    def test_completed_job_has_text_and_closes_audio(self):
+        handler = GatedHandler()
+        handler.gate.set()
+        jobs = JobQueue(handler, workers=1)
+        job = jobs.submit(FakeAudio("a"))
+        audio = job.audio
+        self.assertIs(jobs.wait(job.id, 2), job)
+        self.assertEqual(job.to_dict(), {"job_id": job.id, "status": DONE, "priority": 0, "text": "text-a"})
+        self.assertTrue(audio.closed)
+
+    def test_failed_job_reports_error(self):
+        handler = GatedHandler()
+        handler.gate.set()
+        jobs = JobQueue(handler, workers=1)
+        job = jobs.wait(jobs.submit(FakeAudio("bad")).id, 2)
+        self.assertEqual(job.status, FAILED)
+        self.assertEqual(job.to_dict()["error"], "cannot decode")
+
+    def test_higher_priority_runs_first(self):
+        handler = GatedHandler()
+        jobs, blocker = self.make(handler)
+        submitted = [jobs.submit(FakeAudio(name), priority) for name, priority in
+                     (("low", 0), ("high", 5), ("low2", 0), ("mid", 1))]
+        handler.gate.set()
+        for job in submitted:
+            jobs.wait(job.id, 2)
+        self.assertEqual(handler.order, ["blocker", "high", "mid", "low", "low2"])
+
+    def test_full_queue_raises_with_retry_after(self):
+        handler = GatedHandler()
+        jobs, blocker = self.make(handler, max_queued=2)
+        jobs.submit(FakeAudio("a"))
+        jobs.submit(FakeAudio("b"))
+        self.assertTrue(jobs.is_full())
+        with self.assertRaises(QueueFullError) as ctx:
+            jobs.submit(FakeAudio("c"))
+        self.assertGreaterEqual(ctx.exception.retry_after_s, 1)
+        handler.gate.set()
+
+    def test_cancel_queued_job(self):
+        handler = GatedHandler()
+        jobs, blocker = self.make(handler)
+        job = jobs.submit(FakeAudio("a"))
+        audio = job.audio
+        self.assertEqual(jobs.cancel(job.id), (job, True))
+        self.assertEqual(job.status, CANCELLED)
+        self.assertTrue(audio.closed)
+        self.assertEqual(jobs.stats()["queued"], 0)
+        # 正在执行的任务不能取消
+        self.assertEqual(jobs.cancel(blocker.id), (blocker, False))
+        self.assertEqual(jobs.cancel("missing"), (None, False))
+        handler.gate.set()
+        jobs.wait(blocker.id, 2)
+        self.assertNotIn("a", handler.order)
+
+    def test_finished_jobs_expire_after_ttl(self):
+        handler = GatedHandler()
+        handler.gate.set()
+        jobs = JobQueue(handler, workers=1, result_ttl_s=0.1)
+        done = jobs.wait(jobs.submit(FakeAudio("a")).id, 2)
+        self.assertEqual(done.status, DONE)
+        deadline = time.monotonic() + 3
+        while jobs.get(done.id) is not None and time.monotonic() < deadline:
+            time.sleep(0.1)
+        self.assertIsNone(jobs.get(done.id))
+
+    def test_queued_jobs_do_not_expire(self):
+        handler = GatedHandler()
+        jobs, blocker = self.make(handler, result_ttl_s=0.1)
+        job = jobs.submit(FakeAudio("a"))
+        time.sleep(1.5)
+        self.assertEqual(jobs.get(job.id).status, QUEUED)
+        handler.gate.set()
+
+
+if __name__ == "__main__":
+    unittest.main()
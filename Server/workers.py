@@ -0,0 +1,217 @@
+import itertools
+import multiprocessing
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import Future
+
+
+def _worker_main(worker_id, generation, engine_factory, model_dir, device, num_threads, warmup_durations_s, tasks, results):
+    # 模型加载并预热完成后才报告 ready，重启的进程也不会把冷启动的开销留给真实请求
+    try:
+        started = time.perf_counter()
+        engine = engine_factory(model_dir, device, num_threads)
+        load_s = time.perf_counter() - started
+        warmup_s = engine.warm_up(warmup_durations_s) if warmup_durations_s else 0.0
+    except Exception:
+        results.put(("failed", worker_id, generation, None, traceback.format_exc()))
+        return
+    results.put(("ready", worker_id, generation, None, {"load_s": round(load_s, 3), "warmup_s": round(warmup_s, 3)}))
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        task_id, method, args = task
+        try:
+            value = getattr(engine, method)(*args)
+        except Exception as exc:
+            results.put(("error", worker_id, generation, task_id, f"{type(exc).__name__}: {exc}"))
+        else:
+            results.put(("done", worker_id, generation, task_id, value))
+
+
+class WorkerError(RuntimeError):
+    pass
+
+
+class _Worker:
+    def __init__(self, worker_id, device):
+        self.worker_id = worker_id
+        self.device = device
+        self.generation = 0
+        self.process = None
+        self.tasks = None
+        self.ready = False
+        self.failed = False
+        self.assigned = None
+        self.startup = None
+
+
+class WorkerPool:
+    def __init__(self, engine_factory, model_dir, devices, threads_per_worker=None, monitor_interval_s=1.0, warmup_durations_s=()):
+        self.engine_factory = engine_factory
+        self.model_dir = model_dir
+        self.threads_per_worker = threads_per_worker
+        self.warmup_durations_s = tuple(warmup_durations_s)
+        self.monitor_interval_s = monitor_interval_s
+        self._context = multiprocessing.get_context("spawn")
+        self._results = self._context.Queue()
+        self._pending = queue.Queue()
+        self._task_ids = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._workers = [_Worker(worker_id, device) for worker_id, device in enumerate(devices)]
+        for worker in self._workers:
+            self._start_worker(worker)
+        self._threads = [
+            threading.Thread(target=self._dispatch_loop, name="asr-pool-dispatch", daemon=True),
+            threading.Thread(target=self._collect_loop, name="asr-pool-collect", daemon=True),
+            threading.Thread(target=self._monitor_loop, name="asr-pool-monitor", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def size(self):
+        return len(self._workers)
+
+    @property
+    def available(self):
+        with self._cond:
+            return any(worker.ready for worker in self._workers)
+
+    def wait_ready(self, timeout=None):
+        # 等到每个进程都已就绪或启动失败，返回就绪的进程数
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not all(worker.ready or worker.failed for worker in self._workers):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return sum(worker.ready for worker in self._workers)
+
+    def status(self):
+        with self._cond:
+            return [
+                dict(worker.startup or {}, id=worker.worker_id, device=worker.device, ready=worker.ready,
+                     failed=worker.failed, restarts=worker.generation - 1)
+                for worker in self._workers
+            ]
+
+    def generate(self, inputs):
+        return self.submit("generate", inputs).result()
+
+    def vad_segments(self, waveform):
+        return self.submit("vad_segments", waveform).result()
+
+    def transcribe_segment(self, segment):
+        return self.submit("transcribe_segment", segment).result()
+
+    def submit(self, method, *args):
+        future = Future()
+        if self._closed:
+            raise RuntimeError("WorkerPool is closed")
+        self._pending.put((next(self._task_ids), method, args, future))
+        return future
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._pending.put(None)
+        for worker in self._workers:
+            worker.tasks.put(None)
+        for worker in self._workers:
+            worker.process.join(timeout=10)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        self._results.put(("stop", None, None, None, None))
+
+    def _start_worker(self, worker):
+        worker.generation += 1
+        worker.ready = False
+        worker.assigned = None
+        worker.startup = None
+        worker.tasks = self._context.Queue()
+        worker.process = self._context.Process(
+            target=_worker_main,
+            args=(worker.worker_id, worker.generation, self.engine_factory, self.model_dir,
+                  worker.device, self.threads_per_worker, self.warmup_durations_s, worker.tasks, self._results),
+            name=f"asr-worker-{worker.worker_id}",
+            daemon=True,
+        )
+        worker.process.start()
+
+    def _acquire_idle_worker(self):
+        with self._cond:
+            while not self._closed and not all(worker.failed for worker in self._workers):
+                for worker in self._workers:
+                    if worker.ready and worker.assigned is None:
+                        return worker
+                self._cond.wait()
+            return None
+
+    def _dispatch_loop(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            task_id, method, args, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            worker = self._acquire_idle_worker()
+            if worker is None:
+                future.set_exception(WorkerError("No ASR worker is available"))
+                continue
+            with self._cond:
+                worker.assigned = (task_id, future)
+                worker.tasks.put((task_id, method, args))
+
+    def _collect_loop(self):
+        while True:
+            kind, worker_id, generation, task_id, value = self._results.get()
+            if kind == "stop":
+                return
+            with self._cond:
+                worker = self._workers[worker_id]
+                # 忽略已被重启的旧进程发来的消息
+                if generation != worker.generation:
+                    continue
+                if kind == "ready":
+                    worker.ready = True
+                    worker.startup = value
+                    print(f"ASR worker {worker_id} on {worker.device} ready: "
+                          f"model loaded in {value['load_s']:.1f}s, warm-up {value['warmup_s']:.1f}s")
+                elif kind == "failed":
+                    worker.failed = True
+                    print(f"ASR worker {worker_id} on {worker.device} failed to start:\n{value}")
+                elif worker.assigned is not None and worker.assigned[0] == task_id:
+                    future = worker.assigned[1]
+                    worker.assigned = None
+                    if kind == "done":
+                        future.set_result(value)
+                    else:
+                        future.set_exception(WorkerError(value))
+                self._cond.notify_all()
+
+    def _monitor_loop(self):
+        while True:
+            with self._cond:
+                self._cond.wait(self.monitor_interval_s)
+                if self._closed:
+                    return
+                for worker in self._workers:
+                    if worker.failed or worker.process.is_alive():
+                        continue
+                    if not worker.ready:
+                        # 启动阶段就退出的进程不再重启，避免无限重启循环
+                        worker.failed = True
+                        print(f"ASR worker {worker.worker_id} on {worker.device} exited with code {worker.process.exitcode} during startup")
+                        continue
+                    print(f"ASR worker {worker.worker_id} on {worker.device} exited with code {worker.process.exitcode}, restarting")
+                    if worker.assigned is not None:
+                        worker.assigned[1].set_exception(WorkerError(f"Worker {worker.worker_id} crashed while processing the request"))
+                    self._start_worker(worker)
+                self._cond.notify_all()